@@ -0,0 +1,95 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+DB_PATH = 'data/drop_analyzer.db'
+
+# Number of reader connections kept open per process
+READER_POOL_SIZE = 8
+
+# Prepared statements cached per connection, above the number of distinct handler queries
+STATEMENT_CACHE_SIZE = 256
+
+# Applied to every connection when it is opened
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-131072',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_spill=0',
+    'PRAGMA wal_autocheckpoint=1000',
+)
+
+# Seconds between PRAGMA optimize runs as connections go back to the pool
+OPTIMIZE_INTERVAL = 3600
+
+# Readers are reused most-recently-returned first so their page caches stay warm
+_readers = queue.LifoQueue(maxsize=READER_POOL_SIZE)
+_reader_slots = threading.BoundedSemaphore(READER_POOL_SIZE)
+
+# SQLite allows a single writer at a time, so writes share one connection
+_writer = None
+_writer_lock = threading.Lock()
+
+_last_optimize = time.monotonic()
+_optimize_lock = threading.Lock()
+
+def _make_conn() -> sqlite3.Connection:
+    """Open a connection with the pool's pragmas applied"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _maybe_optimize(conn: sqlite3.Connection):
+    """Let SQLite refresh planner statistics now and then on a returned connection"""
+    global _last_optimize
+
+    with _optimize_lock:
+        if time.monotonic() - _last_optimize < OPTIMIZE_INTERVAL:
+            return
+        _last_optimize = time.monotonic()
+
+    # Best effort, a busy database just waits for the next interval
+    try:
+        conn.execute('PRAGMA optimize')
+    except sqlite3.Error:
+        pass
+
+@contextmanager
+def get_conn() -> Iterator[sqlite3.Connection]:
+    """Borrow a reader connection, opening one if the pool has none idle"""
+    with _reader_slots:
+        try:
+            conn = _readers.get_nowait()
+        except queue.Empty:
+            conn = _make_conn()
+
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            _maybe_optimize(conn)
+            _readers.put_nowait(conn)
+
+@contextmanager
+def get_write_conn() -> Iterator[sqlite3.Connection]:
+    """Hold the writer connection; anything left uncommitted is rolled back"""
+    global _writer
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = _make_conn()
+
+        try:
+            yield _writer
+        finally:
+            if _writer.in_transaction:
+                _writer.rollback()
+            _maybe_optimize(_writer)
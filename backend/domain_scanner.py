@@ -1,9 +1,13 @@
+import ahocorasick
+import asyncio
+import contextlib
+import functools
+import random
 import socket
 import ssl
-import whois
-import dns.resolver
-import json
-import requests
+import threading
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import time
@@ -13,49 +17,178 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Record types fetched for every domain
+DNS_RECORD_TYPES = ('NS', 'A', 'MX', 'TXT', 'CNAME')
+
+# Maximum number of domains analyzed concurrently in a batch
+BATCH_CONCURRENCY = 50
+
+# Maximum number of concurrent WHOIS lookups against one TLD's servers in a batch
+WHOIS_CONCURRENCY_PER_TLD = 4
+
+# Upper bound in seconds of the first WHOIS retry delay, doubled on each attempt
+WHOIS_BACKOFF_BASE = 1
+
+# Lifetime in seconds of a single DNS lookup, including retries
+DNS_LIFETIME = 3
+
+# (analysis section, key, points) added to the quality score when the key is present
+QUALITY_WEIGHTS = (
+    ('dns_records', 'ns_records', 20),
+    ('dns_records', 'a_records', 20),
+    ('dns_records', 'mx_records', 15),
+    ('dns_records', 'txt_records', 10),
+    ('whois_info', 'registrar', 10),
+    ('whois_info', 'creation_date', 10),
+    ('whois_info', 'name_servers', 10),
+    ('ssl_info', 'has_ssl', 15),
+)
+
+# WHOIS response fragments meaning the domain can be registered
+AVAILABLE_INDICATORS = (
+    "no match for", "not found", "no data found", "no entries found",
+    "domain not found", "no object found", "no matching record",
+    "status: free", "status: available", "is available for registration",
+    "domain status: no object found", "no match!!", "not registered",
+    "available for registration", "domain available", "available domain",
+    "free domain", "domain free", "unregistered domain", "domain unregistered",
+    "no match", "not found in database", "no matching record found",
+    "domain name not found", "object does not exist", "no such domain",
+    "domain status: available", "registration status: available",
+    "state: available", "domain state: available", "available for purchase",
+    "this domain is available", "domain is available", "can be registered",
+    "eligible for registration", "free for registration", "open for registration",
+    "ready for registration", "registration available", "status code: 210",
+    "status code: 220", "response: 210", "response: 220",
+)
+
+# WHOIS response fragments meaning the domain is registered
+UNAVAILABLE_INDICATORS = (
+    "registrar:", "registrant:", "creation date:", "updated date:",
+    "expiration date:", "name server:", "nserver:", "status: registered",
+    "status: active", "status: ok", "status: connect",
+    "status: clienttransferprohibited", "status: servertransferprohibited",
+    "domain status: registered", "domain status: active", "registration date:",
+    "expiry date:", "registry expiry date:", "registrar registration expiration date:",
+    "admin contact:", "tech contact:", "billing contact:", "dnssec:",
+    "domain servers in listed order:", "registered domain", "registered on:",
+    "expires on:", "last updated on:", "changed:", "holder:", "person:",
+    "sponsoring registrar:", "whois server:", "referral url:", "domain name:",
+    "registry domain id:", "registrar whois server:", "registrar url:",
+    "registrar iana id:", "registrar abuse contact email:",
+    "registrar abuse contact phone:", "reseller:", "domain status:",
+    "name server", "dnssec: unsigned", "dnssec: signed",
+)
+
+# WHOIS text is lowercased and scanned in slices of this many characters, so
+# a long response is never copied whole. Consecutive slices overlap by one
+# character less than the longest indicator so no match is split.
+WHOIS_SCAN_CHUNK = 4096
+WHOIS_SCAN_OVERLAP = max(map(len, AVAILABLE_INDICATORS + UNAVAILABLE_INDICATORS)) - 1
+
+# Process-wide state shared by every DomainScanner, so creating a scanner per
+# request costs nothing. Lookup results are cached with a TTL: WHOIS keyed by
+# registered domain, DNS by the exact name queried.
+_WHOIS_CACHE = TTLCache(maxsize=10000, ttl=3600)
+_DNS_CACHE = TTLCache(maxsize=10000, ttl=300)
+_CACHE_LOCK = threading.Lock()
+
+# The factories below build the immutable shared objects on first use.
+# dnspython, python-whois and cryptography are imported lazily where they
+# are needed, keeping them out of the import time of short-lived jobs.
+
+@functools.lru_cache(maxsize=None)
+def _indicator_automaton() -> ahocorasick.Automaton:
+    """Aho-Corasick automaton mapping each indicator to whether it marks availability"""
+    automaton = ahocorasick.Automaton()
+    for indicator in AVAILABLE_INDICATORS:
+        automaton.add_word(indicator, True)
+    for indicator in UNAVAILABLE_INDICATORS:
+        automaton.add_word(indicator, False)
+    automaton.make_automaton()
+    return automaton
+
+@functools.lru_cache(maxsize=None)
+def _get_resolver():
+    """Resolver configured once instead of re-reading the system config per query"""
+    import dns.resolver
+    
+    # Domains are always fully qualified, so the search list is never applied
+    resolver = dns.resolver.Resolver(configure=True)
+    resolver.search = []
+    resolver.lifetime = DNS_LIFETIME
+    return resolver
+
+@functools.lru_cache(maxsize=None)
+def _get_async_resolver():
+    """Async counterpart of _get_resolver"""
+    import dns.asyncresolver
+    
+    resolver = dns.asyncresolver.Resolver()
+    resolver.search = []
+    resolver.lifetime = DNS_LIFETIME
+    return resolver
+
+@functools.lru_cache(maxsize=None)
+def _get_whois_client():
+    """WHOIS client keeping resolved registry addresses between queries"""
+    from whois_client import WhoisClient
+    return WhoisClient()
+
+@functools.lru_cache(maxsize=None)
+def _ssl_context() -> ssl.SSLContext:
+    """Certificates are only inspected, not verified, so one context serves every probe"""
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+def _get_cached(cache: TTLCache, key: str) -> Optional[Dict]:
+    with _CACHE_LOCK:
+        return cache.get(key)
+
+def _set_cached(cache: TTLCache, key: str, value: Dict):
+    with _CACHE_LOCK:
+        cache[key] = value
+
+def reset_caches():
+    """Drop cached lookup results and rebuild shared objects on next use"""
+    with _CACHE_LOCK:
+        _WHOIS_CACHE.clear()
+        _DNS_CACHE.clear()
+    for factory in (_indicator_automaton, _get_resolver, _get_async_resolver, _get_whois_client, _ssl_context):
+        factory.cache_clear()
+
 class DomainScanner:
     """
     Domain scanner based on xuemian168/domain-scanner functionality
     Provides DNS, WHOIS, and SSL certificate analysis
     """
-    
-    def __init__(self):
-        self.available_indicators = [
-            "no match for", "not found", "no data found", "no entries found",
-            "domain not found", "no object found", "no matching record",
-            "status: free", "status: available", "is available for registration",
-            "domain status: no object found", "no match!!", "not registered",
-            "available for registration", "domain available", "available domain",
-            "free domain", "domain free", "unregistered domain", "domain unregistered",
-            "no match", "not found in database", "no matching record found",
-            "domain name not found", "object does not exist", "no such domain",
-            "domain status: available", "registration status: available",
-            "state: available", "domain state: available", "available for purchase",
-            "this domain is available", "domain is available", "can be registered",
-            "eligible for registration", "free for registration", "open for registration",
-            "ready for registration", "registration available", "status code: 210",
-            "status code: 220", "response: 210", "response: 220",
-        ]
-        
-        self.unavailable_indicators = [
-            "registrar:", "registrant:", "creation date:", "updated date:",
-            "expiration date:", "name server:", "nserver:", "status: registered",
-            "status: active", "status: ok", "status: connect",
-            "status: clienttransferprohibited", "status: servertransferprohibited",
-            "domain status: registered", "domain status: active", "registration date:",
-            "expiry date:", "registry expiry date:", "registrar registration expiration date:",
-            "admin contact:", "tech contact:", "billing contact:", "dnssec:",
-            "domain servers in listed order:", "registered domain", "registered on:",
-            "expires on:", "last updated on:", "changed:", "holder:", "person:",
-            "sponsoring registrar:", "whois server:", "referral url:", "domain name:",
-            "registry domain id:", "registrar whois server:", "registrar url:",
-            "registrar iana id:", "registrar abuse contact email:",
-            "registrar abuse contact phone:", "reseller:", "domain status:",
-            "name server", "dnssec: unsigned", "dnssec: signed",
-        ]
+
+    def _classify_whois(self, raw_data: str) -> Tuple[bool, bool]:
+        """Return (has availability indicator, has registration indicator) for WHOIS text"""
+        automaton = _indicator_automaton()
+        has_available = has_registered = False
+        
+        # Indicators are lowercase and the automaton is case-sensitive
+        for start in range(0, len(raw_data), WHOIS_SCAN_CHUNK):
+            chunk = raw_data[start:start + WHOIS_SCAN_CHUNK + WHOIS_SCAN_OVERLAP].lower()
+            for _, marks_available in automaton.iter(chunk):
+                if marks_available:
+                    has_available = True
+                else:
+                    has_registered = True
+                if has_available and has_registered:
+                    return has_available, has_registered
+        
+        return has_available, has_registered
 
     def check_dns_records(self, domain: str) -> Dict[str, any]:
         """Check DNS records for a domain"""
+        cached = _get_cached(_DNS_CACHE, domain)
+        if cached is not None:
+            return cached
+        
         dns_info = {
             'ns_records': [],
             'a_records': [],
@@ -65,37 +198,39 @@ class DomainScanner:
         }
         
         try:
+            resolver = _get_resolver()
+            
             # NS Records
             try:
-                ns_records = dns.resolver.resolve(domain, 'NS')
+                ns_records = resolver.resolve(domain, 'NS', search=False)
                 dns_info['ns_records'] = [str(record) for record in ns_records]
             except:
                 pass
             
             # A Records
             try:
-                a_records = dns.resolver.resolve(domain, 'A')
+                a_records = resolver.resolve(domain, 'A', search=False)
                 dns_info['a_records'] = [str(record) for record in a_records]
             except:
                 pass
             
             # MX Records
             try:
-                mx_records = dns.resolver.resolve(domain, 'MX')
+                mx_records = resolver.resolve(domain, 'MX', search=False)
                 dns_info['mx_records'] = [f"{record.preference} {record.exchange}" for record in mx_records]
             except:
                 pass
             
             # TXT Records
             try:
-                txt_records = dns.resolver.resolve(domain, 'TXT')
+                txt_records = resolver.resolve(domain, 'TXT', search=False)
                 dns_info['txt_records'] = [str(record) for record in txt_records]
             except:
                 pass
             
             # CNAME Records
             try:
-                cname_records = dns.resolver.resolve(domain, 'CNAME')
+                cname_records = resolver.resolve(domain, 'CNAME', search=False)
                 dns_info['cname_records'] = [str(record) for record in cname_records]
             except:
                 pass
@@ -103,10 +238,68 @@ class DomainScanner:
         except Exception as e:
             logger.error(f"Error checking DNS for {domain}: {e}")
         
+        _set_cached(_DNS_CACHE, domain, dns_info)
+        return dns_info
+
+    async def check_dns_records_async(self, domain: str) -> Dict[str, any]:
+        """Check DNS records for a domain, querying all record types concurrently"""
+        cached = _get_cached(_DNS_CACHE, domain)
+        if cached is not None:
+            return cached
+        
+        dns_info = {
+            'ns_records': [],
+            'a_records': [],
+            'mx_records': [],
+            'txt_records': [],
+            'cname_records': []
+        }
+        
+        resolver = _get_async_resolver()
+        ns, a, mx, txt, cname = await asyncio.gather(
+            *[resolver.resolve(domain, rtype, search=False) for rtype in DNS_RECORD_TYPES],
+            return_exceptions=True
+        )
+        
+        if not isinstance(ns, BaseException):
+            dns_info['ns_records'] = [str(record) for record in ns]
+        if not isinstance(a, BaseException):
+            dns_info['a_records'] = [str(record) for record in a]
+        if not isinstance(mx, BaseException):
+            dns_info['mx_records'] = [f"{record.preference} {record.exchange}" for record in mx]
+        if not isinstance(txt, BaseException):
+            dns_info['txt_records'] = [str(record) for record in txt]
+        if not isinstance(cname, BaseException):
+            dns_info['cname_records'] = [str(record) for record in cname]
+        
+        _set_cached(_DNS_CACHE, domain, dns_info)
         return dns_info
 
     def check_whois_info(self, domain: str, max_retries: int = 3) -> Dict[str, any]:
-        """Check WHOIS information for a domain"""
+        """Check WHOIS information for a domain, cached per registered domain"""
+        from whois import extract_domain
+        
+        # extract_domain reverse-resolves IP addresses and raises when there is
+        # no PTR record, the address itself is then used as the cache key
+        try:
+            apex = extract_domain(domain)
+        except Exception:
+            apex = domain
+        
+        cached = _get_cached(_WHOIS_CACHE, apex)
+        if cached is not None:
+            return cached
+        
+        whois_info = self._query_whois(domain, max_retries)
+        
+        # Only successful lookups are cached so failures get retried next time
+        if whois_info['raw_data']:
+            _set_cached(_WHOIS_CACHE, apex, whois_info)
+        
+        return whois_info
+
+    def _query_whois(self, domain: str, max_retries: int) -> Dict[str, any]:
+        """Query the WHOIS server for a domain"""
         whois_info = {
             'raw_data': '',
             'registrar': '',
@@ -122,9 +315,11 @@ class DomainScanner:
             'is_available': False
         }
         
+        from whois.parser import PywhoisError
+        
         for attempt in range(max_retries):
             try:
-                w = whois.whois(domain)
+                w = _get_whois_client().whois(domain)
                 
                 if w:
                     whois_info['raw_data'] = str(w)
@@ -135,31 +330,82 @@ class DomainScanner:
                     whois_info['name_servers'] = w.name_servers if hasattr(w, 'name_servers') and w.name_servers else []
                     whois_info['status'] = w.status if hasattr(w, 'status') and w.status else []
                     
-                    # Check if domain is registered
-                    raw_lower = whois_info['raw_data'].lower()
-                    
-                    # Check for availability indicators
-                    is_available = any(indicator in raw_lower for indicator in self.available_indicators)
-                    
-                    # Check for registration indicators
-                    is_registered = any(indicator in raw_lower for indicator in self.unavailable_indicators)
-                    
-                    whois_info['is_available'] = is_available and not is_registered
-                    whois_info['is_registered'] = is_registered
+                    self._set_availability(whois_info)
                     
                 break
                 
+            except PywhoisError as e:
+                # The parser rejects "no match" responses, the domain is simply
+                # not registered and asking again will not change that
+                whois_info['raw_data'] = str(e)
+                self._set_availability(whois_info)
+                break
+                
+            except socket.gaierror as e:
+                # No WHOIS server exists for this TLD
+                if e.errno == socket.EAI_NONAME:
+                    logger.error(f"No WHOIS server found for {domain}: {e}")
+                    break
+                self._wait_before_retry(domain, attempt, max_retries, e)
+                
             except Exception as e:
-                logger.warning(f"WHOIS attempt {attempt + 1} failed for {domain}: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(2)
-                else:
-                    logger.error(f"All WHOIS attempts failed for {domain}")
+                self._wait_before_retry(domain, attempt, max_retries, e)
         
         return whois_info
 
+    def _set_availability(self, whois_info: Dict):
+        """Set the availability flags of WHOIS info from its raw text"""
+        is_available, is_registered = self._classify_whois(whois_info['raw_data'])
+        
+        whois_info['is_available'] = is_available and not is_registered
+        whois_info['is_registered'] = is_registered
+
+    def _wait_before_retry(self, domain: str, attempt: int, max_retries: int, error: Exception):
+        """Log a failed WHOIS attempt and sleep with exponential backoff and full jitter"""
+        logger.warning(f"WHOIS attempt {attempt + 1} failed for {domain}: {error}")
+        if attempt < max_retries - 1:
+            time.sleep(random.uniform(0, WHOIS_BACKOFF_BASE * 2 ** attempt))
+        else:
+            logger.error(f"All WHOIS attempts failed for {domain}")
+
     def check_ssl_certificate(self, domain: str, timeout: int = 5) -> Dict[str, any]:
         """Check SSL certificate for a domain"""
+        cert = None
+        
+        try:
+            with socket.create_connection((domain, 443), timeout=timeout) as sock:
+                with _ssl_context().wrap_socket(sock, server_hostname=domain) as ssock:
+                    cert = ssock.getpeercert(binary_form=True)
+        
+        except Exception as e:
+            logger.warning(f"SSL check failed for {domain}: {e}")
+        
+        return self._build_ssl_info(cert)
+
+    async def check_ssl_async(self, domain: str, timeout: int = 5) -> Dict[str, any]:
+        """Check SSL certificate for a domain without blocking the event loop"""
+        cert = None
+        
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(domain, 443, ssl=_ssl_context(), server_hostname=domain),
+                timeout=timeout
+            )
+            try:
+                cert = writer.get_extra_info('ssl_object').getpeercert(binary_form=True)
+            finally:
+                writer.close()
+                # The certificate is already read, a slow or failed TLS shutdown does not matter
+                with contextlib.suppress(Exception):
+                    await asyncio.wait_for(writer.wait_closed(), timeout=timeout)
+        
+        except Exception as e:
+            logger.warning(f"SSL check failed for {domain}: {e}")
+        
+        return self._build_ssl_info(cert)
+
+    def _build_ssl_info(self, der_cert: Optional[bytes]) -> Dict[str, any]:
+        """Build SSL info from a DER-encoded peer certificate"""
         ssl_info = {
             'has_ssl': False,
             'issuer': '',
@@ -171,70 +417,45 @@ class DomainScanner:
             'signature_algorithm': ''
         }
         
-        try:
-            context = ssl.create_default_context()
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
+        if der_cert:
+            from cryptography import x509
             
-            with socket.create_connection((domain, 443), timeout=timeout) as sock:
-                with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                    cert = ssock.getpeercert()
-                    
-                    if cert:
-                        ssl_info['has_ssl'] = True
-                        ssl_info['issuer'] = dict(x[0] for x in cert.get('issuer', []))
-                        ssl_info['subject'] = dict(x[0] for x in cert.get('subject', []))
-                        ssl_info['not_before'] = cert.get('notBefore', '')
-                        ssl_info['not_after'] = cert.get('notAfter', '')
-                        ssl_info['serial_number'] = cert.get('serialNumber', '')
-                        ssl_info['version'] = cert.get('version', '')
-                        
-        except Exception as e:
-            logger.warning(f"SSL check failed for {domain}: {e}")
+            try:
+                cert = x509.load_der_x509_certificate(der_cert)
+                
+                ssl_info['has_ssl'] = True
+                ssl_info['issuer'] = cert.issuer.rfc4514_string()
+                ssl_info['subject'] = cert.subject.rfc4514_string()
+                ssl_info['not_before'] = cert.not_valid_before_utc.isoformat()
+                ssl_info['not_after'] = cert.not_valid_after_utc.isoformat()
+                ssl_info['serial_number'] = format(cert.serial_number, 'x')
+                ssl_info['version'] = cert.version.name
+                if cert.signature_hash_algorithm:
+                    ssl_info['signature_algorithm'] = cert.signature_hash_algorithm.name
+            except Exception as e:
+                logger.warning(f"Failed to parse SSL certificate: {e}")
         
         return ssl_info
 
-    def check_domain_signatures(self, domain: str) -> List[str]:
-        """Check domain signatures similar to the Go implementation"""
+    def check_domain_signatures(self, dns_records: Dict, whois_info: Dict, ssl_info: Dict) -> List[str]:
+        """Derive domain signatures, similar to the Go implementation, from probe results"""
         signatures = []
         
-        try:
-            # Check DNS NS records
-            try:
-                ns_records = dns.resolver.resolve(domain, 'NS')
-                if ns_records:
-                    signatures.append('DNS_NS')
-            except:
-                pass
-            
-            # Check DNS A records
-            try:
-                a_records = dns.resolver.resolve(domain, 'A')
-                if a_records:
-                    signatures.append('DNS_A')
-            except:
-                pass
-            
-            # Check DNS MX records
-            try:
-                mx_records = dns.resolver.resolve(domain, 'MX')
-                if mx_records:
-                    signatures.append('DNS_MX')
-            except:
-                pass
-            
-            # Check WHOIS
-            whois_info = self.check_whois_info(domain)
-            if whois_info['is_registered']:
-                signatures.append('WHOIS')
-            
-            # Check SSL
-            ssl_info = self.check_ssl_certificate(domain)
-            if ssl_info['has_ssl']:
-                signatures.append('SSL')
-                
-        except Exception as e:
-            logger.error(f"Error checking signatures for {domain}: {e}")
+        # DNS records
+        if dns_records.get('ns_records'):
+            signatures.append('DNS_NS')
+        if dns_records.get('a_records'):
+            signatures.append('DNS_A')
+        if dns_records.get('mx_records'):
+            signatures.append('DNS_MX')
+        
+        # WHOIS
+        if whois_info.get('is_registered'):
+            signatures.append('WHOIS')
+        
+        # SSL
+        if ssl_info.get('has_ssl'):
+            signatures.append('SSL')
         
         return signatures
 
@@ -255,17 +476,20 @@ class DomainScanner:
         }
         
         try:
-            # DNS Analysis
-            analysis['dns_records'] = self.check_dns_records(domain)
-            
-            # WHOIS Analysis
-            analysis['whois_info'] = self.check_whois_info(domain)
-            
-            # SSL Analysis
-            analysis['ssl_info'] = self.check_ssl_certificate(domain)
+            # DNS, WHOIS and SSL probes are independent, run them side by side
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                dns_future = executor.submit(self.check_dns_records, domain)
+                whois_future = executor.submit(self.check_whois_info, domain)
+                ssl_future = executor.submit(self.check_ssl_certificate, domain)
+                
+                analysis['dns_records'] = dns_future.result()
+                analysis['whois_info'] = whois_future.result()
+                analysis['ssl_info'] = ssl_future.result()
             
             # Signatures
-            analysis['signatures'] = self.check_domain_signatures(domain)
+            analysis['signatures'] = self.check_domain_signatures(
+                analysis['dns_records'], analysis['whois_info'], analysis['ssl_info']
+            )
             
             # Availability
             analysis['is_available'] = analysis['whois_info']['is_available']
@@ -284,32 +508,7 @@ class DomainScanner:
 
     def _calculate_quality_score(self, analysis: Dict) -> int:
         """Calculate domain quality score based on various factors"""
-        score = 0
-        
-        # DNS records presence
-        dns = analysis['dns_records']
-        if dns.get('ns_records'):
-            score += 20
-        if dns.get('a_records'):
-            score += 20
-        if dns.get('mx_records'):
-            score += 15
-        if dns.get('txt_records'):
-            score += 10
-        
-        # WHOIS information
-        whois = analysis['whois_info']
-        if whois.get('registrar'):
-            score += 10
-        if whois.get('creation_date'):
-            score += 10
-        if whois.get('name_servers'):
-            score += 10
-        
-        # SSL certificate
-        if analysis['ssl_info'].get('has_ssl'):
-            score += 15
-        
+        score = sum(points for section, key, points in QUALITY_WEIGHTS if analysis[section].get(key))
         return min(score, 100)
 
     def _generate_recommendations(self, analysis: Dict) -> List[str]:
@@ -334,8 +533,71 @@ class DomainScanner:
         
         return recommendations
 
+    async def analyze_domain_async(self, domain: str,
+                                   whois_semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, any]:
+        """Comprehensive domain analysis using the async DNS resolver"""
+        logger.info(f"Analyzing domain: {domain}")
+        
+        analysis = {
+            'domain': domain,
+            'timestamp': datetime.now().isoformat(),
+            'dns_records': {},
+            'whois_info': {},
+            'ssl_info': {},
+            'signatures': [],
+            'is_available': None,
+            'quality_score': 0,
+            'recommendations': []
+        }
+        
+        try:
+            # DNS, WHOIS and SSL probes are independent, run them side by side.
+            # WHOIS lookups are blocking, keep them off the event loop.
+            analysis['dns_records'], analysis['whois_info'], analysis['ssl_info'] = await asyncio.gather(
+                self.check_dns_records_async(domain),
+                self._check_whois_async(domain, whois_semaphore),
+                self.check_ssl_async(domain)
+            )
+            
+            # Signatures
+            analysis['signatures'] = self.check_domain_signatures(
+                analysis['dns_records'], analysis['whois_info'], analysis['ssl_info']
+            )
+            
+            # Availability
+            analysis['is_available'] = analysis['whois_info']['is_available']
+            
+            # Quality Score Calculation
+            analysis['quality_score'] = self._calculate_quality_score(analysis)
+            
+            # Recommendations
+            analysis['recommendations'] = self._generate_recommendations(analysis)
+            
+        except Exception as e:
+            logger.error(f"Error analyzing domain {domain}: {e}")
+            analysis['error'] = str(e)
+        
+        return analysis
+
+    async def _check_whois_async(self, domain: str, semaphore: Optional[asyncio.Semaphore]) -> Dict[str, any]:
+        """Run the blocking WHOIS lookup in a thread, optionally bounded by a semaphore"""
+        if semaphore is None:
+            return await asyncio.to_thread(self.check_whois_info, domain)
+        
+        async with semaphore:
+            return await asyncio.to_thread(self.check_whois_info, domain)
+
+    @staticmethod
+    def _tld(domain: str) -> str:
+        """Top-level domain used to group WHOIS lookups"""
+        return domain.rsplit('.', 1)[-1].lower()
+
     def batch_analyze_domains(self, domains: List[str]) -> Dict[str, any]:
         """Analyze multiple domains in batch"""
+        return asyncio.run(self.batch_analyze_domains_async(domains))
+
+    async def batch_analyze_domains_async(self, domains: List[str]) -> Dict[str, any]:
+        """Analyze multiple domains concurrently, at most BATCH_CONCURRENCY at a time"""
         results = {
             'total_domains': len(domains),
             'processed': 0,
@@ -344,19 +606,42 @@ class DomainScanner:
             'domains': []
         }
         
-        for domain in domains:
-            try:
-                analysis = self.analyze_domain(domain)
-                results['domains'].append(analysis)
-                results['successful'] += 1
-            except Exception as e:
-                logger.error(f"Failed to analyze {domain}: {e}")
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        # Start domains grouped by TLD so consecutive WHOIS queries go to the
+        # same registry, and cap the concurrent lookups against each registry
+        order = sorted(range(len(domains)), key=lambda i: self._tld(domains[i]))
+        whois_semaphores = {
+            tld: asyncio.Semaphore(WHOIS_CONCURRENCY_PER_TLD) for tld in map(self._tld, domains)
+        }
+        
+        async def sem_wrap(coro):
+            async with semaphore:
+                return await coro
+        
+        scheduled = await asyncio.gather(
+            *[sem_wrap(self.analyze_domain_async(domains[i], whois_semaphores[self._tld(domains[i])]))
+              for i in order],
+            return_exceptions=True
+        )
+        
+        # Report results in input order
+        analyses = [None] * len(domains)
+        for i, analysis in zip(order, scheduled):
+            analyses[i] = analysis
+        
+        for domain, analysis in zip(domains, analyses):
+            if isinstance(analysis, Exception):
+                logger.error(f"Failed to analyze {domain}: {analysis}")
                 results['domains'].append({
                     'domain': domain,
-                    'error': str(e),
+                    'error': str(analysis),
                     'timestamp': datetime.now().isoformat()
                 })
                 results['failed'] += 1
+            else:
+                results['domains'].append(analysis)
+                results['successful'] += 1
             
             results['processed'] += 1
         
@@ -0,0 +1,145 @@
+import uuid
+import orjson
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from db_pool import get_conn, get_write_conn
+
+logger = logging.getLogger(__name__)
+
+# Batches run concurrently per process; each batch already fans out internally
+JOB_WORKERS = 4
+
+# Finished jobs are kept this long for clients to collect their results
+JOB_RETENTION = '-1 day'
+
+# Seconds between heartbeats on the unfinished jobs a process owns
+JOB_HEARTBEAT_INTERVAL = 60
+
+# Unfinished jobs without a heartbeat for this long belong to a worker that
+# restarted or was killed
+JOB_HEARTBEAT_TIMEOUT = '-5 minutes'
+
+# Identifies this process's jobs; a restarted worker gets a new id
+WORKER_ID = uuid.uuid4().hex
+
+SQL_INSERT_JOB = '''
+    INSERT INTO jobs (id, user_id, job_type, status, worker, heartbeat_at)
+    VALUES (?, ?, ?, 'queued', ?, CURRENT_TIMESTAMP)
+'''
+SQL_PRUNE_JOBS = '''
+    DELETE FROM jobs
+    WHERE finished_at < datetime('now', ?)
+       OR (finished_at IS NULL AND COALESCE(heartbeat_at, created_at) < datetime('now', ?))
+'''
+SQL_HEARTBEAT_JOBS = '''
+    UPDATE jobs SET heartbeat_at = CURRENT_TIMESTAMP
+    WHERE worker = ? AND status IN ('queued', 'running')
+'''
+SQL_FAIL_STALE_JOBS = '''
+    UPDATE jobs SET status = 'failed', error = ?, finished_at = CURRENT_TIMESTAMP
+    WHERE status IN ('queued', 'running') AND worker IS NOT ?
+      AND COALESCE(heartbeat_at, created_at) < datetime('now', ?)
+'''
+SQL_START_JOB = "UPDATE jobs SET status = 'running', started_at = CURRENT_TIMESTAMP WHERE id = ?"
+# Rows already failed as stale keep that outcome
+SQL_FINISH_JOB = '''
+    UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = CURRENT_TIMESTAMP
+    WHERE id = ? AND status IN ('queued', 'running')
+'''
+SQL_GET_JOB = '''
+    SELECT id, user_id, job_type, status, result, error, created_at, started_at, finished_at
+    FROM jobs WHERE id = ?
+'''
+
+STALE_JOB_ERROR = 'Job was interrupted before it finished, please run it again'
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='job')
+
+def recover_jobs():
+    """Fail jobs left queued or running by a worker that is gone"""
+    with get_write_conn() as conn:
+        cursor = conn.execute(SQL_FAIL_STALE_JOBS, (STALE_JOB_ERROR, WORKER_ID, JOB_HEARTBEAT_TIMEOUT))
+        conn.commit()
+
+    if cursor.rowcount:
+        logger.warning(f"Marked {cursor.rowcount} interrupted jobs as failed")
+
+def _heartbeat():
+    """Keep this process's jobs alive and fail those of workers that stopped"""
+    while True:
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+        try:
+            with get_write_conn() as conn:
+                conn.execute(SQL_HEARTBEAT_JOBS, (WORKER_ID,))
+                conn.commit()
+            recover_jobs()
+        except Exception as e:
+            logger.error(f"Job heartbeat failed: {e}")
+
+threading.Thread(target=_heartbeat, name='job-heartbeat', daemon=True).start()
+
+def submit_job(user_id: int, job_type: str, func: Callable, *args) -> str:
+    """Record a queued job and run func(*args) on the background pool"""
+    job_id = uuid.uuid4().hex
+
+    with get_write_conn() as conn:
+        conn.execute(SQL_INSERT_JOB, (job_id, user_id, job_type, WORKER_ID))
+        conn.execute(SQL_PRUNE_JOBS, (JOB_RETENTION, JOB_RETENTION))
+        conn.commit()
+
+    _executor.submit(_run_job, job_id, func, args)
+    return job_id
+
+def _run_job(job_id: str, func: Callable, args: tuple):
+    """Run a job and store its result or error"""
+    # The executor drops exceptions, so a failed start is recorded here
+    try:
+        with get_write_conn() as conn:
+            conn.execute(SQL_START_JOB, (job_id,))
+            conn.commit()
+    except Exception as e:
+        logger.error(f"Job {job_id} could not be started: {e}")
+        _finish_job(job_id, 'failed', None, f'Job could not be started: {e}')
+        return
+
+    try:
+        result = orjson.dumps(func(*args)).decode()
+        status, error = 'finished', None
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}")
+        result, status, error = None, 'failed', str(e)
+
+    _finish_job(job_id, status, result, error)
+
+def _finish_job(job_id: str, status: str, result: Optional[str], error: Optional[str]):
+    """Store a job's outcome, logging instead of raising if the write fails"""
+    try:
+        with get_write_conn() as conn:
+            conn.execute(SQL_FINISH_JOB, (status, result, error, job_id))
+            conn.commit()
+    except Exception as e:
+        logger.error(f"Could not save the outcome of job {job_id}: {e}")
+
+def get_job(job_id: str) -> Optional[Dict[str, any]]:
+    """Return a job's status and, once finished, its result"""
+    with get_conn() as conn:
+        job = conn.execute(SQL_GET_JOB, (job_id,)).fetchone()
+
+    if not job:
+        return None
+
+    return {
+        'id': job['id'],
+        'user_id': job['user_id'],
+        'type': job['job_type'],
+        'status': job['status'],
+        'result': orjson.loads(job['result']) if job['result'] else None,
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at']
+    }
@@ -1,11 +1,74 @@
-import requests
-import json
-import sqlite3
-from typing import Dict, List, Optional
+import asyncio
+import orjson
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 import logging
 
+# httpx and db_pool (and with it sqlite3) are imported where they are first needed
+if TYPE_CHECKING:
+    import httpx
+
 logger = logging.getLogger(__name__)
 
+# Headers sent with every OpenRouter request
+OPENROUTER_HEADERS = {
+    'Content-Type': 'application/json',
+    'HTTP-Referer': 'https://drop-analyzer.com',
+    'X-Title': 'Drop Analyzer'
+}
+
+# Maximum number of concurrent OpenRouter requests in a batch
+LLM_CONCURRENCY = 8
+
+DEFAULT_ANALYSIS_PROMPT = 'Analyze the following domain data and provide insights about its quality, potential, and recommendations for use.'
+
+SYSTEM_PROMPT = 'You are a domain analysis expert. Provide detailed, actionable insights about domain quality and potential.'
+
+# Appended to every prompt after the domain information
+ANALYSIS_INSTRUCTIONS = "\n\nPlease provide a comprehensive analysis including:\n1. Domain quality assessment\n2. Business potential\n3. Technical evaluation\n4. Recommendations\n5. Risk factors\n\nProvide the response in a structured format."
+
+class CompletionStream:
+    """
+    Accumulates a streamed (SSE) chat completion line by line
+    
+    Only the content deltas are kept, so memory stays at the size of the
+    answer rather than the raw event stream.
+    """
+    
+    def __init__(self):
+        self._parts: List[str] = []
+        self.usage: Dict[str, int] = {}
+    
+    def feed(self, line: str):
+        """Process one line of the event stream"""
+        # Blank separators and ': keep-alive' comments carry no data
+        if not line.startswith('data: '):
+            return
+        
+        data = line[6:]
+        if data == '[DONE]':
+            return
+        
+        chunk = orjson.loads(data)
+        if 'error' in chunk:
+            # The error is usually an object with a message, but may be a bare string
+            error = chunk['error']
+            if isinstance(error, dict):
+                error = error.get('message', error)
+            raise Exception(f"OpenRouter API error: {error}")
+        
+        if chunk.get('choices'):
+            delta = chunk['choices'][0].get('delta', {}).get('content')
+            if delta:
+                self._parts.append(delta)
+        
+        # Usage is reported on the final chunk
+        if chunk.get('usage'):
+            self.usage = chunk['usage']
+    
+    @property
+    def content(self) -> str:
+        return ''.join(self._parts)
+
 class LLMAnalyzer:
     """
     LLM analyzer using OpenRouter API for domain analysis
@@ -13,34 +76,55 @@ class LLMAnalyzer:
     
     def __init__(self):
         self.openrouter_base_url = "https://openrouter.ai/api/v1"
+    
+    def _create_client(self) -> 'httpx.AsyncClient':
+        """Create an OpenRouter HTTP/2 client, shared by every request in a batch"""
+        import httpx
+        
+        return httpx.AsyncClient(
+            base_url=self.openrouter_base_url,
+            http2=True,
+            timeout=30,
+            headers=OPENROUTER_HEADERS
+        )
         
     def get_settings(self) -> Dict[str, str]:
         """Get LLM settings from database"""
-        conn = sqlite3.connect('data/drop_analyzer.db')
-        cursor = conn.cursor()
+        from db_pool import get_conn
         
         settings = {}
-        cursor.execute('SELECT key, value FROM settings WHERE key IN (?, ?, ?)', 
-                      ('openrouter_api_key', 'openrouter_model', 'analysis_prompt'))
-        
-        for key, value in cursor.fetchall():
-            settings[key] = value
+        with get_conn() as conn:
+            cursor = conn.execute('SELECT key, value FROM settings WHERE key IN (?, ?, ?)', 
+                                  ('openrouter_api_key', 'openrouter_model', 'analysis_prompt'))
+            
+            for key, value in cursor.fetchall():
+                settings[key] = value
         
-        conn.close()
         return settings
     
+    def _get_llm_config(self) -> Dict[str, str]:
+        """Get API key, model and prompt template from settings"""
+        settings = self.get_settings()
+        
+        return {
+            'api_key': settings.get('openrouter_api_key', ''),
+            'model': settings.get('openrouter_model', 'openai/gpt-3.5-turbo'),
+            'prompt_template': settings.get('analysis_prompt', DEFAULT_ANALYSIS_PROMPT)
+        }
+    
     def analyze_domains_with_llm(self, domains_data: List[Dict]) -> Dict[str, any]:
         """
         Analyze domains using LLM with configured prompt and model
         """
-        settings = self.get_settings()
-        
-        api_key = settings.get('openrouter_api_key', '')
-        model = settings.get('openrouter_model', 'openai/gpt-3.5-turbo')
-        prompt_template = settings.get('analysis_prompt', 
-            'Analyze the following domain data and provide insights about its quality, potential, and recommendations for use.')
+        return asyncio.run(self.analyze_domains_with_llm_async(domains_data))
+    
+    async def analyze_domains_with_llm_async(self, domains_data: List[Dict]) -> Dict[str, any]:
+        """
+        Analyze domains concurrently, at most LLM_CONCURRENCY requests at a time
+        """
+        config = self._get_llm_config()
         
-        if not api_key:
+        if not config['api_key']:
             return {
                 'error': 'OpenRouter API key not configured. Please configure it in settings.',
                 'domains': []
@@ -54,48 +138,77 @@ class LLMAnalyzer:
             'domains': []
         }
         
-        for domain_data in domains_data:
-            try:
-                analysis = self._analyze_single_domain(domain_data, api_key, model, prompt_template)
-                results['domains'].append(analysis)
-                results['successful'] += 1
-            except Exception as e:
-                logger.error(f"Failed to analyze {domain_data.get('domain', 'unknown')}: {e}")
+        semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+        
+        async with self._create_client() as client:
+            async def analyze(domain_data):
+                async with semaphore:
+                    return await self._analyze_single_domain_async(
+                        client, domain_data, config['api_key'], config['model'], config['prompt_template']
+                    )
+            
+            analyses = await asyncio.gather(
+                *[analyze(domain_data) for domain_data in domains_data],
+                return_exceptions=True
+            )
+        
+        pending = []
+        
+        for domain_data, analysis in zip(domains_data, analyses):
+            if isinstance(analysis, Exception):
+                logger.error(f"Failed to analyze {domain_data.get('domain', 'unknown')}: {analysis}")
                 results['domains'].append({
                     'domain': domain_data.get('domain', 'unknown'),
-                    'error': str(e),
+                    'error': str(analysis),
                     'llm_analysis': None
                 })
                 results['failed'] += 1
+            else:
+                results['domains'].append(analysis)
+                results['successful'] += 1
+                pending.append((analysis['domain'], analysis['llm_analysis']))
             
             results['processed'] += 1
         
+        # Save all LLM analyses to database in one transaction
+        self._save_llm_analyses(pending)
+        
         return results
     
-    def _analyze_single_domain(self, domain_data: Dict, api_key: str, model: str, prompt_template: str) -> Dict:
-        """Analyze a single domain with LLM"""
-        domain = domain_data.get('domain', 'unknown')
+    async def _analyze_single_domain_async(self, client: 'httpx.AsyncClient', domain_data: Dict,
+                                           api_key: str, model: str, prompt_template: str) -> Dict:
+        """Analyze a single domain with LLM using an async client"""
+        stream = CompletionStream()
         
+        async with client.stream(
+            'POST',
+            '/chat/completions',
+            headers={'Authorization': f'Bearer {api_key}'},
+            content=orjson.dumps(self._build_payload(domain_data, model, prompt_template))
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                self._raise_api_error(response)
+            
+            async for line in response.aiter_lines():
+                stream.feed(line)
+        
+        return self._build_result(domain_data.get('domain', 'unknown'), model, stream)
+    
+    def _build_payload(self, domain_data: Dict, model: str, prompt_template: str) -> Dict:
+        """Build the chat completion request for a domain"""
         # Prepare domain information for LLM
         domain_info = self._prepare_domain_info(domain_data)
         
         # Create the full prompt
-        full_prompt = f"{prompt_template}\n\nDomain Information:\n{domain_info}\n\nPlease provide a comprehensive analysis including:\n1. Domain quality assessment\n2. Business potential\n3. Technical evaluation\n4. Recommendations\n5. Risk factors\n\nProvide the response in a structured format."
-        
-        # Make API call to OpenRouter
-        headers = {
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json',
-            'HTTP-Referer': 'https://drop-analyzer.com',
-            'X-Title': 'Drop Analyzer'
-        }
+        full_prompt = f"{prompt_template}\n\nDomain Information:\n{domain_info}{ANALYSIS_INSTRUCTIONS}"
         
-        payload = {
+        return {
             'model': model,
             'messages': [
                 {
                     'role': 'system',
-                    'content': 'You are a domain analysis expert. Provide detailed, actionable insights about domain quality and potential.'
+                    'content': SYSTEM_PROMPT
                 },
                 {
                     'role': 'user',
@@ -103,107 +216,91 @@ class LLMAnalyzer:
                 }
             ],
             'temperature': 0.7,
-            'max_tokens': 1000
+            'max_tokens': 1000,
+            'stream': True
         }
+    
+    def _build_result(self, domain: str, model: str, stream: 'CompletionStream') -> Dict:
+        """Turn a finished completion stream into an analysis result"""
+        content = stream.content
+        if not content:
+            raise Exception(f"OpenRouter API error: empty completion for {domain}")
         
-        response = requests.post(
-            f"{self.openrouter_base_url}/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            llm_response = result['choices'][0]['message']['content']
-            
-            # Save LLM analysis to database
-            self._save_llm_analysis(domain, llm_response)
-            
-            return {
-                'domain': domain,
-                'llm_analysis': llm_response,
-                'model_used': model,
-                'tokens_used': result.get('usage', {}).get('total_tokens', 0),
-                'status': 'success'
-            }
-        else:
-            error_msg = f"OpenRouter API error: {response.status_code} - {response.text}"
-            logger.error(error_msg)
-            raise Exception(error_msg)
+        return {
+            'domain': domain,
+            'llm_analysis': content,
+            'model_used': model,
+            'tokens_used': stream.usage.get('total_tokens', 0),
+            'status': 'success'
+        }
+    
+    def _raise_api_error(self, response: 'httpx.Response'):
+        """Log and raise a non-200 OpenRouter response"""
+        error_msg = f"OpenRouter API error: {response.status_code} - {response.text}"
+        logger.error(error_msg)
+        raise Exception(error_msg)
     
     def _prepare_domain_info(self, domain_data: Dict) -> str:
         """Prepare domain information for LLM analysis"""
-        domain = domain_data.get('domain', 'unknown')
-        quality_score = domain_data.get('quality_score', 0)
         is_available = domain_data.get('is_available', None)
-        dns_records = domain_data.get('dns_records', {})
-        whois_info = domain_data.get('whois_info', {})
-        ssl_info = domain_data.get('ssl_info', {})
+        dns_records = domain_data.get('dns_records') or {}
+        whois_info = domain_data.get('whois_info') or {}
+        ssl_info = domain_data.get('ssl_info') or {}
         signatures = domain_data.get('signatures', [])
         
-        info_parts = [
-            f"Domain: {domain}",
-            f"Quality Score: {quality_score}/100",
-            f"Availability: {'Available' if is_available else 'Registered' if is_available is False else 'Unknown'}",
-            f"Technical Signatures: {', '.join(signatures) if signatures else 'None'}",
-        ]
-        
         # DNS Information
-        if dns_records:
-            dns_info = []
-            if dns_records.get('ns_records'):
-                dns_info.append(f"NS Records: {len(dns_records['ns_records'])}")
-            if dns_records.get('a_records'):
-                dns_info.append(f"A Records: {len(dns_records['a_records'])}")
-            if dns_records.get('mx_records'):
-                dns_info.append(f"MX Records: {len(dns_records['mx_records'])}")
-            if dns_info:
-                info_parts.append(f"DNS: {', '.join(dns_info)}")
+        dns_parts = ', '.join(filter(None, (
+            dns_records.get('ns_records') and f"NS Records: {len(dns_records['ns_records'])}",
+            dns_records.get('a_records') and f"A Records: {len(dns_records['a_records'])}",
+            dns_records.get('mx_records') and f"MX Records: {len(dns_records['mx_records'])}",
+        )))
         
         # WHOIS Information
-        if whois_info:
-            whois_parts = []
-            if whois_info.get('registrar'):
-                whois_parts.append(f"Registrar: {whois_info['registrar']}")
-            if whois_info.get('creation_date'):
-                whois_parts.append(f"Created: {whois_info['creation_date']}")
-            if whois_info.get('expiration_date'):
-                whois_parts.append(f"Expires: {whois_info['expiration_date']}")
-            if whois_parts:
-                info_parts.append(f"WHOIS: {', '.join(whois_parts)}")
+        whois_parts = ', '.join(filter(None, (
+            whois_info.get('registrar') and f"Registrar: {whois_info['registrar']}",
+            whois_info.get('creation_date') and f"Created: {whois_info['creation_date']}",
+            whois_info.get('expiration_date') and f"Expires: {whois_info['expiration_date']}",
+        )))
         
         # SSL Information
-        if ssl_info and ssl_info.get('has_ssl'):
-            ssl_parts = []
-            if ssl_info.get('issuer'):
-                issuer = ssl_info['issuer']
-                if isinstance(issuer, dict):
-                    ssl_parts.append(f"Issuer: {issuer.get('organizationName', 'Unknown')}")
-            if ssl_info.get('not_after'):
-                ssl_parts.append(f"SSL Expires: {ssl_info['not_after']}")
-            if ssl_parts:
-                info_parts.append(f"SSL: {', '.join(ssl_parts)}")
-        
-        return '\n'.join(info_parts)
-    
-    def _save_llm_analysis(self, domain: str, analysis: str):
-        """Save LLM analysis to database"""
+        ssl_parts = ''
+        if ssl_info.get('has_ssl'):
+            issuer = ssl_info.get('issuer')
+            if issuer and isinstance(issuer, dict):
+                issuer = issuer.get('organizationName', 'Unknown')
+            ssl_parts = ', '.join(filter(None, (
+                issuer and f"Issuer: {issuer}",
+                ssl_info.get('not_after') and f"SSL Expires: {ssl_info['not_after']}",
+            )))
+        
+        return '\n'.join(filter(None, (
+            f"Domain: {domain_data.get('domain', 'unknown')}",
+            f"Quality Score: {domain_data.get('quality_score', 0)}/100",
+            f"Availability: {'Available' if is_available else 'Registered' if is_available is False else 'Unknown'}",
+            f"Technical Signatures: {', '.join(signatures) if signatures else 'None'}",
+            dns_parts and f"DNS: {dns_parts}",
+            whois_parts and f"WHOIS: {whois_parts}",
+            ssl_parts and f"SSL: {ssl_parts}",
+        )))
+    
+    def _save_llm_analyses(self, analyses: List[Tuple[str, str]]):
+        """Save (domain, analysis) pairs to database in a single transaction"""
+        if not analyses:
+            return
+        
+        from db_pool import get_write_conn
+        
         try:
-            conn = sqlite3.connect('data/drop_analyzer.db')
-            cursor = conn.cursor()
-            
-            # Update domain with LLM analysis
-            cursor.execute('''
-                UPDATE domains 
-                SET description = COALESCE(description, '') || '\n\nLLM Analysis:\n' || ?
-                WHERE domain = ?
-            ''', (analysis, domain))
-            
-            conn.commit()
-            conn.close()
+            with get_write_conn() as conn:
+                # Update domains with LLM analysis
+                conn.executemany('''
+                    UPDATE domains 
+                    SET description = COALESCE(description, '') || '\n\nLLM Analysis:\n' || ?
+                    WHERE domain = ?
+                ''', [(analysis, domain) for domain, analysis in analyses])
+                conn.commit()
         except Exception as e:
-            logger.error(f"Failed to save LLM analysis for {domain}: {e}")
+            logger.error(f"Failed to save LLM analysis for {', '.join(domain for domain, _ in analyses)}: {e}")
     
     def get_available_models(self) -> List[Dict[str, str]]:
         """Get list of available OpenRouter models"""
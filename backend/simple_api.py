@@ -1,15 +1,32 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
 from flask_cors import CORS
+import asyncio
+import atexit
 import jwt
-from datetime import datetime  # Исправленный импорт
+import bcrypt
+from datetime import datetime, timedelta  # Исправленный импорт
 import sqlite3
 import os
 import hashlib
-import json
+import hmac
+import secrets
+import orjson
+import threading
+import time
+from cachetools import TLRUCache, TTLCache
+from db_pool import get_conn, get_write_conn
 from domain_scanner import DomainScanner
+from jobs import get_job, recover_jobs, submit_job
 from llm_analyzer import LLMAnalyzer
 from webarchive_analyzer import WebArchiveAnalyzer
 
+# Run the analyzers' asyncio batches on uvloop where it is available
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
@@ -17,155 +34,374 @@ CORS(app, resources={r"/api/*": {"origins": "*"}})
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'dev-jwt-secret')
 
+def ojsonify(obj):
+    # orjson serializes responses several times faster than Flask's stdlib-based jsonify
+    return Response(orjson.dumps(obj), mimetype='application/json')
+
+# Verified tokens are trusted for at most this many seconds before being decoded
+# again, which also bounds how long a logout takes to reach other workers
+TOKEN_CACHE_TTL = 30
+
+# Largest page the list endpoints will return
+MAX_PER_PAGE = 200
+
+# Seconds between writes of buffered last_login timestamps
+LAST_LOGIN_FLUSH_INTERVAL = 30
+
+# Statements run by request handlers. Each pooled connection caches prepared
+# statements by their exact text, so handlers always pass these constants.
+SQL_TOKEN_REVOKED = 'SELECT 1 FROM revoked_tokens WHERE jti = ?'
+SQL_REVOKE_TOKEN = 'INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)'
+SQL_PRUNE_REVOKED_TOKENS = 'DELETE FROM revoked_tokens WHERE expires_at < ?'
+
+SQL_LOGIN = 'SELECT id, username, role, is_active, password_hash FROM users WHERE username = ?'
+SQL_REHASH_PASSWORD = 'UPDATE users SET password_hash = ? WHERE id = ?'
+SQL_SET_LAST_LOGIN = 'UPDATE users SET last_login = ? WHERE id = ?'
+
+SQL_INSERT_USER = 'INSERT INTO users (username, password_hash, email, role) VALUES (?, ?, ?, ?)'
+SQL_USER_EXISTS = 'SELECT id FROM users WHERE id = ?'
+SQL_DELETE_USER = 'DELETE FROM users WHERE id = ?'
+
+_USERS_SEARCH = 'WHERE id IN (SELECT rowid FROM users_fts WHERE users_fts MATCH ?)'
+_USERS_PAGE = '''
+    SELECT id, username, email, role, is_active, created_at, last_login, COUNT(*) OVER() AS total
+    FROM users
+    {where}
+    ORDER BY created_at DESC
+    LIMIT ? OFFSET ?
+'''
+SQL_USERS_PAGE = _USERS_PAGE.format(where='')
+SQL_USERS_SEARCH_PAGE = _USERS_PAGE.format(where=_USERS_SEARCH)
+SQL_USERS_COUNT = 'SELECT COUNT(*) FROM users'
+SQL_USERS_SEARCH_COUNT = f'SELECT COUNT(*) FROM users {_USERS_SEARCH}'
+
+# Columns returned by the domain list; the JSON blobs are left to the detail endpoint
+DOMAIN_LIST_COLUMNS = (
+    'id, domain, quality_score, total_snapshots, years_covered, ai_category, is_good, recommended, '
+    'has_snapshot, first_snapshot, last_snapshot, description, is_available, created_at, analyzed_at, '
+    'dns_summary, ssl_expires'
+)
+
+SQL_SAVE_DOMAIN = '''
+    INSERT OR REPLACE INTO domains 
+    (domain, quality_score, dns_records, whois_data, ssl_info, is_available, dns_summary, ssl_expires, analyzed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+'''
+SQL_DOMAINS_PAGE = f'''
+    SELECT {DOMAIN_LIST_COLUMNS}, COUNT(*) OVER() AS total FROM domains
+    ORDER BY analyzed_at DESC
+    LIMIT ? OFFSET ?
+'''
+SQL_DOMAINS_COUNT = 'SELECT COUNT(*) FROM domains'
+SQL_DOMAIN_DETAIL = f'''
+    SELECT {DOMAIN_LIST_COLUMNS}, dns_records, whois_data, ssl_info FROM domains
+    WHERE domain = ?
+'''
+
+SQL_REPORTS_PAGE = '''
+    SELECT r.id, r.report_type, r.report_data, r.created_at, d.domain, COUNT(*) OVER() AS total
+    FROM reports r
+    LEFT JOIN domains d ON r.domain_id = d.id
+    WHERE r.user_id = ?
+    ORDER BY r.created_at DESC
+    LIMIT ? OFFSET ?
+'''
+SQL_REPORTS_COUNT = 'SELECT COUNT(*) FROM reports WHERE user_id = ?'
+SQL_DELETE_REPORT = 'DELETE FROM reports WHERE id = ? AND user_id = ?'
+
+SQL_SETTINGS = 'SELECT key, value FROM settings'
+SQL_SAVE_SETTING = 'INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)'
+
 # Инициализация анализаторов
 domain_scanner = DomainScanner()
 llm_analyzer = LLMAnalyzer()
 webarchive_analyzer = WebArchiveAnalyzer()
 
+# Password hashing
+def hash_password(password):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+
+def is_bcrypt_hash(password_hash):
+    return password_hash.startswith('$2')
+
+def check_password(password, password_hash):
+    if is_bcrypt_hash(password_hash):
+        return bcrypt.checkpw(password.encode(), password_hash.encode())
+    
+    # Accounts created before bcrypt still hold an unsalted SHA-256 digest
+    return hmac.compare_digest(password_hash, hashlib.sha256(password.encode()).hexdigest())
+
+# Checked against when the username does not exist, so failed logins take
+# as long as a wrong password and do not reveal which usernames exist
+DUMMY_PASSWORD_HASH = hash_password(secrets.token_hex(16))
+
 # Database setup
 def init_db():
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
-    
-    # Create users table with roles
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            email TEXT,
-            role TEXT DEFAULT 'user',
-            is_active BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_login TIMESTAMP
-        )
-    ''')
-    
-    # Create domains table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS domains (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            domain TEXT UNIQUE NOT NULL,
-            quality_score INTEGER DEFAULT 0,
-            total_snapshots INTEGER DEFAULT 0,
-            years_covered INTEGER DEFAULT 0,
-            ai_category TEXT DEFAULT 'unknown',
-            is_good BOOLEAN DEFAULT FALSE,
-            recommended BOOLEAN DEFAULT FALSE,
-            has_snapshot BOOLEAN DEFAULT FALSE,
-            first_snapshot TEXT,
-            last_snapshot TEXT,
-            description TEXT,
-            dns_records TEXT,
-            whois_data TEXT,
-            ssl_info TEXT,
-            is_available BOOLEAN DEFAULT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            analyzed_at TIMESTAMP
-        )
-    ''')
-    
-    # Create reports table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS reports (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            domain_id INTEGER,
-            report_type TEXT DEFAULT 'basic',
-            report_data TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            FOREIGN KEY (domain_id) REFERENCES domains (id)
-        )
-    ''')
-    
-    # Create settings table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS settings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            key TEXT UNIQUE NOT NULL,
-            value TEXT,
-            description TEXT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Insert demo admin user
-    admin_password = hashlib.sha256('admin123'.encode()).hexdigest()
-    cursor.execute('''
-        INSERT OR IGNORE INTO users (username, password_hash, email, role) 
-        VALUES (?, ?, ?, ?)
-    ''', ('admin', admin_password, 'admin@example.com', 'admin'))
-    
-    # Insert demo moderator user
-    mod_password = hashlib.sha256('mod123'.encode()).hexdigest()
-    cursor.execute('''
-        INSERT OR IGNORE INTO users (username, password_hash, email, role) 
-        VALUES (?, ?, ?, ?)
-    ''', ('moderator', mod_password, 'mod@example.com', 'moderator'))
-    
-    # Insert demo regular user
-    user_password = hashlib.sha256('user123'.encode()).hexdigest()
-    cursor.execute('''
-        INSERT OR IGNORE INTO users (username, password_hash, email, role) 
-        VALUES (?, ?, ?, ?)
-    ''', ('user', user_password, 'user@example.com', 'user'))
-    
-    # Insert demo domains
-    demo_domains = [
-        ('example.com', 85, 1234, 15, 'technology', True, True, True, '2008-03-15', '2023-11-20', 'High-quality technology domain with consistent content.'),
-        ('test-site.org', 72, 856, 8, 'education', True, False, True, '2015-06-10', '2023-10-15', 'Educational content with good archive coverage.'),
-        ('demo-domain.net', 45, 234, 3, 'business', False, False, True, '2020-01-01', '2023-08-30', 'Business domain with limited historical data.'),
-        ('quality-site.com', 92, 2156, 18, 'technology', True, True, True, '2005-12-01', '2023-12-01', 'Excellent technology resource with extensive archive.'),
-        ('learning-hub.edu', 78, 945, 12, 'education', True, False, True, '2011-09-15', '2023-11-10', 'Educational platform with consistent quality content.')
-    ]
-    
-    for domain_data in demo_domains:
+    with get_write_conn() as conn:
+        cursor = conn.cursor()
+        
+        # Create users table with roles
         cursor.execute('''
-            INSERT OR IGNORE INTO domains 
-            (domain, quality_score, total_snapshots, years_covered, ai_category, is_good, recommended, has_snapshot, first_snapshot, last_snapshot, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', domain_data)
-    
-    # Insert default settings
-    default_settings = [
-        ('openrouter_api_key', '', 'OpenRouter API key for LLM analysis'),
-        ('openrouter_model', 'openai/gpt-3.5-turbo', 'Default OpenRouter model'),
-        ('analysis_prompt', 'Analyze the following domain data and provide insights about its quality, potential, and recommendations for use.', 'Default prompt for LLM analysis'),
-        ('report_retention_days', '30', 'Number of days to retain user reports'),
-        ('max_domains_per_batch', '10', 'Maximum number of domains per batch analysis')
-    ]
-    
-    for setting in default_settings:
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                email TEXT,
+                role TEXT DEFAULT 'user',
+                is_active BOOLEAN DEFAULT TRUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_login TIMESTAMP
+            )
+        ''')
+        
+        # Create domains table
         cursor.execute('''
+            CREATE TABLE IF NOT EXISTS domains (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                domain TEXT UNIQUE NOT NULL,
+                quality_score INTEGER DEFAULT 0,
+                total_snapshots INTEGER DEFAULT 0,
+                years_covered INTEGER DEFAULT 0,
+                ai_category TEXT DEFAULT 'unknown',
+                is_good BOOLEAN DEFAULT FALSE,
+                recommended BOOLEAN DEFAULT FALSE,
+                has_snapshot BOOLEAN DEFAULT FALSE,
+                first_snapshot TEXT,
+                last_snapshot TEXT,
+                description TEXT,
+                dns_records TEXT,
+                whois_data TEXT,
+                ssl_info TEXT,
+                is_available BOOLEAN DEFAULT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                analyzed_at TIMESTAMP,
+                dns_summary TEXT,
+                ssl_expires TEXT
+            )
+        ''')
+        
+        # Add summary columns to databases created before they existed
+        cursor.execute('PRAGMA table_info(domains)')
+        domain_columns = {column['name'] for column in cursor.fetchall()}
+        for column in ('dns_summary', 'ssl_expires'):
+            if column not in domain_columns:
+                cursor.execute(f'ALTER TABLE domains ADD COLUMN {column} TEXT')
+        
+        # Create reports table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                domain_id INTEGER,
+                report_type TEXT DEFAULT 'basic',
+                report_data TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id),
+                FOREIGN KEY (domain_id) REFERENCES domains (id)
+            )
+        ''')
+        
+        # Create settings table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS settings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT UNIQUE NOT NULL,
+                value TEXT,
+                description TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Create full-text index over username and email, kept in sync by triggers
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'users_fts'")
+        fts_exists = cursor.fetchone() is not None
+        
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS users_fts
+            USING fts5(username, email, content='users', content_rowid='id')
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+                INSERT INTO users_fts (rowid, username, email) VALUES (new.id, new.username, new.email);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+                INSERT INTO users_fts (users_fts, rowid, username, email) VALUES ('delete', old.id, old.username, old.email);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF username, email ON users BEGIN
+                INSERT INTO users_fts (users_fts, rowid, username, email) VALUES ('delete', old.id, old.username, old.email);
+                INSERT INTO users_fts (rowid, username, email) VALUES (new.id, new.username, new.email);
+            END
+        ''')
+        
+        # Index users that existed before the full-text table
+        if not fts_exists:
+            cursor.execute("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
+        
+        # Create jobs table for background analysis batches
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                user_id INTEGER,
+                job_type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                worker TEXT,
+                heartbeat_at TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        
+        # Add ownership columns to jobs tables created before they existed
+        cursor.execute('PRAGMA table_info(jobs)')
+        job_columns = {column['name'] for column in cursor.fetchall()}
+        for column, column_type in (('worker', 'TEXT'), ('heartbeat_at', 'TIMESTAMP')):
+            if column not in job_columns:
+                cursor.execute(f'ALTER TABLE jobs ADD COLUMN {column} {column_type}')
+        
+        # Create revoked tokens table, rows are only needed until the token expires
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS revoked_tokens (
+                jti TEXT PRIMARY KEY,
+                expires_at INTEGER NOT NULL
+            )
+        ''')
+        
+        # Indexes for the list endpoints' filters and sort orders
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_created ON users(created_at DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_domains_analyzed ON domains(analyzed_at DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_reports_user_created ON reports(user_id, created_at DESC)')
+        
+        # Insert demo users into an empty table, hashing only when they are needed
+        cursor.execute('SELECT 1 FROM users LIMIT 1')
+        if not cursor.fetchone():
+            demo_users = [
+                ('admin', hash_password('admin123'), 'admin@example.com', 'admin'),
+                ('moderator', hash_password('mod123'), 'mod@example.com', 'moderator'),
+                ('user', hash_password('user123'), 'user@example.com', 'user')
+            ]
+            cursor.executemany('''
+                INSERT INTO users (username, password_hash, email, role) 
+                VALUES (?, ?, ?, ?)
+            ''', demo_users)
+        
+        # Insert demo domains
+        demo_domains = [
+            ('example.com', 85, 1234, 15, 'technology', True, True, True, '2008-03-15', '2023-11-20', 'High-quality technology domain with consistent content.'),
+            ('test-site.org', 72, 856, 8, 'education', True, False, True, '2015-06-10', '2023-10-15', 'Educational content with good archive coverage.'),
+            ('demo-domain.net', 45, 234, 3, 'business', False, False, True, '2020-01-01', '2023-08-30', 'Business domain with limited historical data.'),
+            ('quality-site.com', 92, 2156, 18, 'technology', True, True, True, '2005-12-01', '2023-12-01', 'Excellent technology resource with extensive archive.'),
+            ('learning-hub.edu', 78, 945, 12, 'education', True, False, True, '2011-09-15', '2023-11-10', 'Educational platform with consistent quality content.')
+        ]
+        
+        # Only seed an empty table, real data makes the demo rows unnecessary
+        cursor.execute('SELECT 1 FROM domains LIMIT 1')
+        if not cursor.fetchone():
+            cursor.executemany('''
+                INSERT INTO domains 
+                (domain, quality_score, total_snapshots, years_covered, ai_category, is_good, recommended, has_snapshot, first_snapshot, last_snapshot, description)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', demo_domains)
+        
+        # Insert default settings
+        default_settings = [
+            ('openrouter_api_key', '', 'OpenRouter API key for LLM analysis'),
+            ('openrouter_model', 'openai/gpt-3.5-turbo', 'Default OpenRouter model'),
+            ('analysis_prompt', 'Analyze the following domain data and provide insights about its quality, potential, and recommendations for use.', 'Default prompt for LLM analysis'),
+            ('report_retention_days', '30', 'Number of days to retain user reports'),
+            ('max_domains_per_batch', '10', 'Maximum number of domains per batch analysis')
+        ]
+        
+        # OR IGNORE rather than an emptiness check, so defaults added later reach existing databases
+        cursor.executemany('''
             INSERT OR IGNORE INTO settings (key, value, description) 
             VALUES (?, ?, ?)
-        ''', setting)
-    
-    conn.commit()
-    conn.close()
+        ''', default_settings)
+        
+        conn.commit()
+        
+        # Refresh planner statistics, sampling so large tables stay quick to start
+        cursor.execute('PRAGMA analysis_limit=1000')
+        cursor.execute('ANALYZE')
 
 # Initialize database
 os.makedirs('data', exist_ok=True)
 init_db()
+recover_jobs()
 
 def generate_token(user_id, username, role):
     payload = {
         'user_id': user_id,
         'username': username,
         'role': role,
-        'exp': datetime.utcnow() + datetime.timedelta(days=1)
+        'jti': secrets.token_hex(16),
+        'exp': datetime.utcnow() + timedelta(days=1)
     }
     return jwt.encode(payload, app.config['JWT_SECRET_KEY'], algorithm='HS256')
 
+def _token_ttu(key, payload, now):
+    # Never serve a cached payload past the token's own expiry
+    return min(payload['exp'], now + TOKEN_CACHE_TTL)
+
+def _token_key(token):
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+# Decoded payloads of recently verified tokens, keyed by a digest of the token
+_token_cache = TLRUCache(maxsize=8192, ttu=_token_ttu, timer=time.time)
+_token_cache_lock = threading.Lock()
+
+# jti -> exp of tokens revoked through this worker, kept until they would expire anyway
+_revoked_tokens = TLRUCache(maxsize=8192, ttu=lambda jti, exp, now: exp, timer=time.time)
+
+def is_token_revoked(jti):
+    with _token_cache_lock:
+        if jti in _revoked_tokens:
+            return True
+    
+    # Revocations made by other workers are only visible in the database
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_TOKEN_REVOKED, (jti,))
+        return cursor.fetchone() is not None
+
+def revoke_token(token, payload):
+    with get_write_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_REVOKE_TOKEN, (payload['jti'], payload['exp']))
+        cursor.execute(SQL_PRUNE_REVOKED_TOKENS, (int(time.time()),))
+        conn.commit()
+    
+    with _token_cache_lock:
+        _revoked_tokens[payload['jti']] = payload['exp']
+        _token_cache.pop(_token_key(token), None)
+
 def verify_token(token):
+    key = _token_key(token)
+    with _token_cache_lock:
+        payload = _token_cache.get(key)
+        if payload is not None and payload.get('jti') not in _revoked_tokens:
+            return payload
+    
     try:
         payload = jwt.decode(token, app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    
+    if 'jti' in payload and is_token_revoked(payload['jti']):
+        return None
+    
+    with _token_cache_lock:
+        _token_cache[key] = payload
+    return payload
 
 def require_auth(f):
     def decorated_function(*args, **kwargs):
@@ -174,11 +410,11 @@ def require_auth(f):
             token = token.replace('Bearer ', '')
         
         if not token:
-            return jsonify({'message': 'Token required'}), 401
+            return ojsonify({'message': 'Token required'}), 401
         
         payload = verify_token(token)
         if not payload:
-            return jsonify({'message': 'Invalid token'}), 401
+            return ojsonify({'message': 'Invalid token'}), 401
         
         request.current_user = payload
         return f(*args, **kwargs)
@@ -189,12 +425,97 @@ def require_auth(f):
 def require_admin(f):
     def decorated_function(*args, **kwargs):
         if not hasattr(request, 'current_user') or request.current_user.get('role') != 'admin':
-            return jsonify({'message': 'Admin access required'}), 403
+            return ojsonify({'message': 'Admin access required'}), 403
         return f(*args, **kwargs)
     
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+def get_pagination():
+    # Malformed values fall back to the defaults, and page size is capped
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), MAX_PER_PAGE)
+    return page, per_page
+
+def stream_page(key, to_dict, page, per_page, query, params, count_query, count_params=()):
+    # The page is read before the response starts, so query errors still become
+    # a 500 and the reader connection is not held while a slow client reads
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        total = page_total(cursor, rows, page, count_query, count_params)
+    
+    # Rows are encoded one at a time rather than as one page-sized body; the totals follow the rows
+    def generate():
+        yield b'{"' + key.encode() + b'":['
+        for i, row in enumerate(rows):
+            if i:
+                yield b','
+            yield orjson.dumps(to_dict(row))
+        
+        meta = orjson.dumps({
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': (total + per_page - 1) // per_page
+        })
+        yield b'],' + meta[1:]
+    
+    return Response(generate(), mimetype='application/json')
+
+def page_total(cursor, rows, page, count_query, params=()):
+    # List queries carry COUNT(*) OVER() as their last column, which is only
+    # missing when the page is empty
+    if rows:
+        return rows[0]['total']
+    if page == 1:
+        return 0
+    
+    cursor.execute(count_query, params)
+    return cursor.fetchone()[0]
+
+def fts_prefix_query(search):
+    # Quote each word so punctuation is not read as FTS syntax, and match it as a prefix
+    return ' '.join('"' + term.replace('"', '""') + '"*' for term in search.split())
+
+# last_login tolerates a little staleness, so logins are buffered per user
+# and written in one batch instead of committing on every login
+_pending_logins = {}
+_pending_logins_lock = threading.Lock()
+
+def record_login(user_id):
+    with _pending_logins_lock:
+        _pending_logins[user_id] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+def flush_logins():
+    with _pending_logins_lock:
+        pending = list(_pending_logins.items())
+        _pending_logins.clear()
+    
+    if not pending:
+        return
+    
+    try:
+        with get_write_conn() as conn:
+            conn.executemany(SQL_SET_LAST_LOGIN, [(logged_in_at, user_id) for user_id, logged_in_at in pending])
+            conn.commit()
+    except sqlite3.Error as e:
+        app.logger.error(f"Failed to save last_login for {len(pending)} users: {e}")
+        
+        # Keep them for the next flush unless the user has logged in again since
+        with _pending_logins_lock:
+            for user_id, logged_in_at in pending:
+                _pending_logins.setdefault(user_id, logged_in_at)
+
+def _flush_logins_periodically():
+    while True:
+        time.sleep(LAST_LOGIN_FLUSH_INTERVAL)
+        flush_logins()
+
+threading.Thread(target=_flush_logins_periodically, name='last-login-flush', daemon=True).start()
+atexit.register(flush_logins)
+
 # Auth routes
 @app.route('/api/v1/auth/login', methods=['POST'])
 def login():
@@ -203,23 +524,28 @@ def login():
     password = data.get('password')
     
     if not username or not password:
-        return jsonify({'message': 'Username and password required'}), 400
+        return ojsonify({'message': 'Username and password required'}), 400
     
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute(SQL_LOGIN, (username,))
+        user = cursor.fetchone()
     
-    password_hash = hashlib.sha256(password.encode()).hexdigest()
-    cursor.execute('SELECT id, username, role, is_active FROM users WHERE username = ? AND password_hash = ?', (username, password_hash))
-    user = cursor.fetchone()
+    password_matches = check_password(password, user[4] if user else DUMMY_PASSWORD_HASH)
     
-    if user and user[3]:  # Check if user is active
+    if user and password_matches and user[3]:  # Check if user is active
+        # Rehash passwords still stored as SHA-256
+        if not is_bcrypt_hash(user[4]):
+            with get_write_conn() as conn:
+                conn.execute(SQL_REHASH_PASSWORD, (hash_password(password), user[0]))
+                conn.commit()
+        
         # Update last login
-        cursor.execute('UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?', (user[0],))
-        conn.commit()
-        conn.close()
+        record_login(user[0])
         
         token = generate_token(user[0], user[1], user[2])
-        return jsonify({
+        return ojsonify({
             'access_token': token, 
             'user': {
                 'id': user[0],
@@ -229,8 +555,7 @@ def login():
             'message': 'Login successful'
         })
     else:
-        conn.close()
-        return jsonify({'message': 'Invalid credentials or account disabled'}), 401
+        return ojsonify({'message': 'Invalid credentials or account disabled'}), 401
 
 @app.route('/api/v1/auth/register', methods=['POST'])
 def register():
@@ -240,68 +565,61 @@ def register():
     email = data.get('email', '')
     
     if not username or not password:
-        return jsonify({'message': 'Username and password required'}), 400
-    
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
+        return ojsonify({'message': 'Username and password required'}), 400
     
-    try:
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        cursor.execute('INSERT INTO users (username, password_hash, email, role) VALUES (?, ?, ?, ?)', 
-                      (username, password_hash, email, 'user'))
-        conn.commit()
-        user_id = cursor.lastrowid
-        conn.close()
+    with get_write_conn() as conn:
+        cursor = conn.cursor()
         
-        token = generate_token(user_id, username, 'user')
-        return jsonify({
-            'access_token': token, 
-            'user': {
-                'id': user_id,
-                'username': username,
-                'role': 'user'
-            },
-            'message': 'Registration successful'
-        }), 201
-    except sqlite3.IntegrityError:
-        conn.close()
-        return jsonify({'message': 'Username already exists'}), 400
+        try:
+            password_hash = hash_password(password)
+            cursor.execute(SQL_INSERT_USER, (username, password_hash, email, 'user'))
+            conn.commit()
+            user_id = cursor.lastrowid
+            
+            token = generate_token(user_id, username, 'user')
+            return ojsonify({
+                'access_token': token, 
+                'user': {
+                    'id': user_id,
+                    'username': username,
+                    'role': 'user'
+                },
+                'message': 'Registration successful'
+            }), 201
+        except sqlite3.IntegrityError:
+            return ojsonify({'message': 'Username already exists'}), 400
+
+@app.route('/api/v1/auth/logout', methods=['POST'])
+@require_auth
+def logout():
+    # Tokens issued before jti was added cannot be revoked, they simply expire
+    if 'jti' in request.current_user:
+        revoke_token(request.headers['Authorization'].replace('Bearer ', ''), request.current_user)
+    
+    return ojsonify({'message': 'Logout successful'})
 
 # Admin routes
 @app.route('/api/v1/admin/users', methods=['GET'])
 @require_auth
 @require_admin
 def get_users():
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
-    
-    page = int(request.args.get('page', 1))
-    per_page = int(request.args.get('per_page', 10))
-    search = request.args.get('search', '')
-    
-    query = 'SELECT id, username, email, role, is_active, created_at, last_login FROM users'
-    params = []
-    
-    if search:
-        query += ' WHERE username LIKE ? OR email LIKE ?'
-        params.extend([f'%{search}%', f'%{search}%'])
-    
-    query += ' ORDER BY created_at DESC'
-    query += f' LIMIT {per_page} OFFSET {(page - 1) * per_page}'
-    
-    cursor.execute(query, params)
-    users = cursor.fetchall()
-    
-    # Get total count
-    count_query = 'SELECT COUNT(*) FROM users'
-    if search:
-        count_query += ' WHERE username LIKE ? OR email LIKE ?'
-        cursor.execute(count_query, [f'%{search}%', f'%{search}%'])
-    else:
-        cursor.execute(count_query)
-    
-    total = cursor.fetchone()[0]
-    conn.close()
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        
+        page, per_page = get_pagination()
+        search = request.args.get('search', '')
+        
+        if search.split():
+            page_query, count_query = SQL_USERS_SEARCH_PAGE, SQL_USERS_SEARCH_COUNT
+            params = (fts_prefix_query(search),)
+        else:
+            page_query, count_query = SQL_USERS_PAGE, SQL_USERS_COUNT
+            params = ()
+        
+        cursor.execute(page_query, (*params, per_page, (page - 1) * per_page))
+        users = cursor.fetchall()
+        
+        total = page_total(cursor, users, page, count_query, params)
     
     user_list = []
     for user in users:
@@ -315,7 +633,7 @@ def get_users():
             'last_login': user[6]
         })
     
-    return jsonify({
+    return ojsonify({
         'users': user_list,
         'total': total,
         'page': page,
@@ -334,32 +652,29 @@ def create_user():
     role = data.get('role', 'user')
     
     if not username or not password:
-        return jsonify({'message': 'Username and password required'}), 400
+        return ojsonify({'message': 'Username and password required'}), 400
     
     if role not in ['admin', 'moderator', 'user']:
-        return jsonify({'message': 'Invalid role'}), 400
-    
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
+        return ojsonify({'message': 'Invalid role'}), 400
     
-    try:
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        cursor.execute('INSERT INTO users (username, password_hash, email, role) VALUES (?, ?, ?, ?)', 
-                      (username, password_hash, email, role))
-        conn.commit()
-        user_id = cursor.lastrowid
-        conn.close()
-        
-        return jsonify({
-            'id': user_id,
-            'username': username,
-            'email': email,
-            'role': role,
-            'message': 'User created successfully'
-        }), 201
-    except sqlite3.IntegrityError:
-        conn.close()
-        return jsonify({'message': 'Username already exists'}), 400
+    with get_write_conn() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            password_hash = hash_password(password)
+            cursor.execute(SQL_INSERT_USER, (username, password_hash, email, role))
+            conn.commit()
+            user_id = cursor.lastrowid
+            
+            return ojsonify({
+                'id': user_id,
+                'username': username,
+                'email': email,
+                'role': role,
+                'message': 'User created successfully'
+            }), 201
+        except sqlite3.IntegrityError:
+            return ojsonify({'message': 'Username already exists'}), 400
 
 @app.route('/api/v1/admin/users/<int:user_id>', methods=['PUT'])
 @require_auth
@@ -367,96 +682,96 @@ def create_user():
 def update_user(user_id):
     data = request.get_json()
     
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
-    
-    # Check if user exists
-    cursor.execute('SELECT id FROM users WHERE id = ?', (user_id,))
-    if not cursor.fetchone():
-        conn.close()
-        return jsonify({'message': 'User not found'}), 404
-    
-    # Update user
-    updates = []
-    params = []
-    
-    if 'email' in data:
-        updates.append('email = ?')
-        params.append(data['email'])
-    
-    if 'role' in data and data['role'] in ['admin', 'moderator', 'user']:
-        updates.append('role = ?')
-        params.append(data['role'])
-    
-    if 'is_active' in data:
-        updates.append('is_active = ?')
-        params.append(data['is_active'])
-    
-    if 'password' in data and data['password']:
-        updates.append('password_hash = ?')
-        params.append(hashlib.sha256(data['password'].encode()).hexdigest())
-    
-    if updates:
-        params.append(user_id)
-        query = f'UPDATE users SET {", ".join(updates)} WHERE id = ?'
-        cursor.execute(query, params)
-        conn.commit()
+    with get_write_conn() as conn:
+        cursor = conn.cursor()
+        
+        # Check if user exists
+        cursor.execute(SQL_USER_EXISTS, (user_id,))
+        if not cursor.fetchone():
+            return ojsonify({'message': 'User not found'}), 404
+        
+        # Update user
+        updates = []
+        params = []
+        
+        if 'email' in data:
+            updates.append('email = ?')
+            params.append(data['email'])
+        
+        if 'role' in data and data['role'] in ['admin', 'moderator', 'user']:
+            updates.append('role = ?')
+            params.append(data['role'])
+        
+        if 'is_active' in data:
+            updates.append('is_active = ?')
+            params.append(data['is_active'])
+        
+        if 'password' in data and data['password']:
+            updates.append('password_hash = ?')
+            params.append(hash_password(data['password']))
+        
+        if updates:
+            params.append(user_id)
+            query = f'UPDATE users SET {", ".join(updates)} WHERE id = ?'
+            cursor.execute(query, params)
+            conn.commit()
     
-    conn.close()
-    return jsonify({'message': 'User updated successfully'})
+    return ojsonify({'message': 'User updated successfully'})
 
 @app.route('/api/v1/admin/users/<int:user_id>', methods=['DELETE'])
 @require_auth
 @require_admin
 def delete_user(user_id):
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
+    with get_write_conn() as conn:
+        cursor = conn.cursor()
+        
+        # Check if user exists
+        cursor.execute(SQL_USER_EXISTS, (user_id,))
+        if not cursor.fetchone():
+            return ojsonify({'message': 'User not found'}), 404
+        
+        # Delete user
+        cursor.execute(SQL_DELETE_USER, (user_id,))
+        conn.commit()
+    
+    return ojsonify({'message': 'User deleted successfully'})
+
+# Domain routes
+def scan_and_save_domains(domains):
+    results = domain_scanner.batch_analyze_domains(domains)
     
-    # Check if user exists
-    cursor.execute('SELECT id FROM users WHERE id = ?', (user_id,))
-    if not cursor.fetchone():
-        conn.close()
-        return jsonify({'message': 'User not found'}), 404
+    rows = [
+        (result['domain'], result['quality_score'], orjson.dumps(result['dns_records']).decode(),
+         orjson.dumps(result['whois_info']).decode(), orjson.dumps(result['ssl_info']).decode(),
+         result['is_available'], summarize_dns(result['dns_records']), result['ssl_info'].get('not_after'))
+        for result in results['domains'] if 'error' not in result
+    ]
     
-    # Delete user
-    cursor.execute('DELETE FROM users WHERE id = ?', (user_id,))
-    conn.commit()
-    conn.close()
+    # Save to database in a single write transaction
+    with get_write_conn() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany(SQL_SAVE_DOMAIN, rows)
+        conn.commit()
     
-    return jsonify({'message': 'User deleted successfully'})
+    return results
 
-# Domain routes
 @app.route('/api/v1/domains/analyze', methods=['POST'])
 @require_auth
 def analyze_domains():
     data = request.get_json()
-    domains = data.get('domains', [])
-    
-    if not domains:
-        return jsonify({'message': 'No domains provided'}), 400
-    
-    results = domain_scanner.batch_analyze_domains(domains)
     
-    # Save to database
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
+    # Each domain is scanned once however often it appears in the input
+    domains = list(dict.fromkeys(
+        domain.strip().lower() for domain in data.get('domains', []) if isinstance(domain, str) and domain.strip()
+    ))
     
-    for result in results['domains']:
-        if 'error' not in result:
-            dns_json = json.dumps(result['dns_records'])
-            whois_json = json.dumps(result['whois_info'])
-            ssl_json = json.dumps(result['ssl_info'])
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO domains 
-                (domain, quality_score, dns_records, whois_data, ssl_info, is_available, analyzed_at)
-                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (result['domain'], result['quality_score'], dns_json, whois_json, ssl_json, result['is_available']))
+    if not domains:
+        return ojsonify({'message': 'No domains provided'}), 400
     
-    conn.commit()
-    conn.close()
+    # Scanning takes seconds per domain, so it runs in the background
+    job_id = submit_job(request.current_user['user_id'], 'analyze', scan_and_save_domains, domains)
     
-    return jsonify(results)
+    return ojsonify({'job_id': job_id, 'status': 'queued'}), 202
 
 @app.route('/api/v1/domains/llm-analyze', methods=['POST'])
 @require_auth
@@ -465,143 +780,139 @@ def llm_analyze_domains():
     domains_data = data.get('domains', [])
     
     if not domains_data:
-        return jsonify({'message': 'No domains provided'}), 400
+        return ojsonify({'message': 'No domains provided'}), 400
+    
+    job_id = submit_job(request.current_user['user_id'], 'llm-analyze', llm_analyzer.analyze_domains_with_llm, domains_data)
+    
+    return ojsonify({'job_id': job_id, 'status': 'queued'}), 202
+
+# Job routes
+@app.route('/api/v1/jobs/<job_id>', methods=['GET'])
+@require_auth
+def get_job_status(job_id):
+    job = get_job(job_id)
     
-    results = llm_analyzer.analyze_domains_with_llm(domains_data)
+    # Jobs are private to the user who started them
+    if not job or (job['user_id'] != request.current_user['user_id'] and request.current_user.get('role') != 'admin'):
+        return ojsonify({'message': 'Job not found'}), 404
     
-    return jsonify(results)
+    return ojsonify(job)
+
+def summarize_dns(dns_records):
+    # e.g. "NS 2, A 1, MX 1"
+    return ', '.join(
+        f"{key.split('_')[0].upper()} {len(records)}" for key, records in dns_records.items() if records
+    )
+
+def domain_to_dict(domain):
+    return {
+        'id': domain['id'],
+        'domain': domain['domain'],
+        'quality_score': domain['quality_score'],
+        'total_snapshots': domain['total_snapshots'],
+        'years_covered': domain['years_covered'],
+        'ai_category': domain['ai_category'],
+        'is_good': bool(domain['is_good']),
+        'recommended': bool(domain['recommended']),
+        'has_snapshot': bool(domain['has_snapshot']),
+        'first_snapshot': domain['first_snapshot'],
+        'last_snapshot': domain['last_snapshot'],
+        'description': domain['description'],
+        'is_available': bool(domain['is_available']) if domain['is_available'] is not None else None,
+        'created_at': domain['created_at'],
+        'analyzed_at': domain['analyzed_at'],
+        'dns_summary': domain['dns_summary'],
+        'ssl_expires': domain['ssl_expires']
+    }
 
 @app.route('/api/v1/domains', methods=['GET'])
 @require_auth
 def get_domains():
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
-    
-    page = int(request.args.get('page', 1))
-    per_page = int(request.args.get('per_page', 10))
-    
-    cursor.execute('''
-        SELECT * FROM domains
-        ORDER BY analyzed_at DESC
-        LIMIT ? OFFSET ?
-    ''', (per_page, (page - 1) * per_page))
-    
-    domains = cursor.fetchall()
-    
-    cursor.execute('SELECT COUNT(*) FROM domains')
-    total = cursor.fetchone()[0]
-    
-    conn.close()
-    
-    domain_list = []
-    for domain in domains:
-        domain_dict = {
-            'id': domain[0],
-            'domain': domain[1],
-            'quality_score': domain[2],
-            'total_snapshots': domain[3],
-            'years_covered': domain[4],
-            'ai_category': domain[5],
-            'is_good': bool(domain[6]),
-            'recommended': bool(domain[7]),
-            'has_snapshot': bool(domain[8]),
-            'first_snapshot': domain[9],
-            'last_snapshot': domain[10],
-            'description': domain[11],
-            'dns_records': json.loads(domain[12]) if domain[12] else {},
-            'whois_data': json.loads(domain[13]) if domain[13] else {},
-            'ssl_info': json.loads(domain[14]) if domain[14] else {},
-            'is_available': bool(domain[15]) if domain[15] is not None else None,
-            'created_at': domain[16],
-            'analyzed_at': domain[17]
-        }
-        domain_list.append(domain_dict)
-    
-    return jsonify({
-        'domains': domain_list,
-        'total': total,
-        'page': page,
-        'per_page': per_page,
-        'pages': (total + per_page - 1) // per_page
-    })
+    page, per_page = get_pagination()
+    
+    return stream_page('domains', domain_to_dict, page, per_page,
+                       SQL_DOMAINS_PAGE, (per_page, (page - 1) * per_page), SQL_DOMAINS_COUNT)
+
+@app.route('/api/v1/domains/<domain>', methods=['GET'])
+@require_auth
+def get_domain(domain):
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute(SQL_DOMAIN_DETAIL, (domain,))
+        row = cursor.fetchone()
+    
+    if not row:
+        return ojsonify({'message': 'Domain not found'}), 404
+    
+    domain_dict = domain_to_dict(row)
+    domain_dict['dns_records'] = orjson.loads(row['dns_records']) if row['dns_records'] else {}
+    domain_dict['whois_data'] = orjson.loads(row['whois_data']) if row['whois_data'] else {}
+    domain_dict['ssl_info'] = orjson.loads(row['ssl_info']) if row['ssl_info'] else {}
+    
+    return ojsonify(domain_dict)
 
 # Reports routes
+def report_to_dict(report):
+    return {
+        'id': report['id'],
+        'type': report['report_type'],
+        'data': orjson.loads(report['report_data']) if report['report_data'] else {},
+        'created_at': report['created_at'],
+        'domain': report['domain']
+    }
+
 @app.route('/api/v1/reports', methods=['GET'])
 @require_auth
 def get_reports():
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
-    
     user_id = request.current_user['user_id']
-    page = int(request.args.get('page', 1))
-    per_page = int(request.args.get('per_page', 10))
-    
-    cursor.execute('''
-        SELECT r.id, r.report_type, r.report_data, r.created_at, d.domain
-        FROM reports r
-        LEFT JOIN domains d ON r.domain_id = d.id
-        WHERE r.user_id = ?
-        ORDER BY r.created_at DESC
-        LIMIT ? OFFSET ?
-    ''', (user_id, per_page, (page - 1) * per_page))
-    
-    reports = cursor.fetchall()
-    
-    cursor.execute('SELECT COUNT(*) FROM reports WHERE user_id = ?', (user_id,))
-    total = cursor.fetchone()[0]
-    
-    conn.close()
-    
-    report_list = []
-    for report in reports:
-        report_list.append({
-            'id': report[0],
-            'type': report[1],
-            'data': json.loads(report[2]) if report[2] else {},
-            'created_at': report[3],
-            'domain': report[4]
-        })
+    page, per_page = get_pagination()
     
-    return jsonify({
-        'reports': report_list,
-        'total': total,
-        'page': page,
-        'per_page': per_page,
-        'pages': (total + per_page - 1) // per_page
-    })
+    return stream_page('reports', report_to_dict, page, per_page,
+                       SQL_REPORTS_PAGE, (user_id, per_page, (page - 1) * per_page), SQL_REPORTS_COUNT, (user_id,))
 
 @app.route('/api/v1/reports/<int:report_id>', methods=['DELETE'])
 @require_auth
 def delete_report(report_id):
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
-    
-    user_id = request.current_user['user_id']
-    
-    cursor.execute('DELETE FROM reports WHERE id = ? AND user_id = ?', (report_id, user_id))
-    if cursor.rowcount == 0:
-        conn.close()
-        return jsonify({'message': 'Report not found or access denied'}), 404
+    with get_write_conn() as conn:
+        cursor = conn.cursor()
+        
+        user_id = request.current_user['user_id']
+        
+        cursor.execute(SQL_DELETE_REPORT, (report_id, user_id))
+        if cursor.rowcount == 0:
+            return ojsonify({'message': 'Report not found or access denied'}), 404
+        
+        conn.commit()
     
-    conn.commit()
-    conn.close()
+    return ojsonify({'message': 'Report deleted successfully'})
+
+# Settings change at human timescales, so they are read from the database at most once a minute
+_settings_cache = TTLCache(maxsize=64, ttl=60)
+_settings_cache_lock = threading.Lock()
+
+def load_settings():
+    with _settings_cache_lock:
+        settings = _settings_cache.get('all')
+    if settings is not None:
+        return settings
+    
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute(SQL_SETTINGS)
+        settings = dict(cursor.fetchall())
     
-    return jsonify({'message': 'Report deleted successfully'})
+    with _settings_cache_lock:
+        _settings_cache['all'] = settings
+    return settings
 
 # Settings routes
 @app.route('/api/v1/settings', methods=['GET'])
 @require_auth
 @require_admin
 def get_settings():
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT key, value FROM settings')
-    settings = dict(cursor.fetchall())
-    
-    conn.close()
-    
-    return jsonify(settings)
+    return ojsonify(load_settings())
 
 @app.route('/api/v1/settings', methods=['PUT'])
 @require_auth
@@ -609,28 +920,27 @@ def get_settings():
 def update_settings():
     data = request.get_json()
     
-    conn = sqlite3.connect('data/drop_analyzer.db')
-    cursor = conn.cursor()
-    
-    for key, value in data.items():
-        cursor.execute('''
-            INSERT OR REPLACE INTO settings (key, value)
-            VALUES (?, ?)
-        ''', (key, value))
+    with get_write_conn() as conn:
+        cursor = conn.cursor()
+        
+        for key, value in data.items():
+            cursor.execute(SQL_SAVE_SETTING, (key, value))
+        
+        conn.commit()
     
-    conn.commit()
-    conn.close()
+    with _settings_cache_lock:
+        _settings_cache.clear()
     
-    return jsonify({'message': 'Settings updated successfully'})
+    return ojsonify({'message': 'Settings updated successfully'})
 
 # Health check
 @app.route('/api/v1/health', methods=['GET'])
 def health():
-    return jsonify({
+    return ojsonify({
         'success': True,
         'message': 'API is healthy',
         'timestamp': datetime.now().isoformat()
     })
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
@@ -1,34 +1,114 @@
-import requests
-import json
+import asyncio
+import orjson
+import threading
 import logging
-from typing import Dict, List, Optional
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+# httpx is imported where it is first needed
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of domains queried against archive.org at once in a batch
+WEBARCHIVE_CONCURRENCY = 20
+
+# Failed connection attempts to archive.org are retried this many times
+WEBARCHIVE_RETRIES = 3
+
+# One row per year with captures, holding the first capture of that year
+CDX_YEARS_QUERY = {'output': 'json', 'fl': 'timestamp', 'collapse': 'timestamp:4'}
+
+# The most recent capture; a negative limit makes CDX return the last rows
+CDX_LAST_QUERY = {'output': 'json', 'fl': 'timestamp', 'limit': '-1'}
+
+# Number of CDX result pages. A page holds many captures, so this is a
+# coarse measure of archive depth, not a snapshot count.
+CDX_COUNT_QUERY = {'output': 'json', 'showNumPages': 'true'}
+
+# Archive data for a domain changes slowly, so lookups are reused for 15 minutes
+# across dashboard refreshes and retries. Only lookups whose queries all
+# succeeded are cached.
+# Cached results are copied in and out, so callers may modify what they get.
+CACHE_TTL = 900
+_AVAILABILITY_CACHE = TTLCache(maxsize=4096, ttl=CACHE_TTL)
+_COUNT_CACHE = TTLCache(maxsize=4096, ttl=CACHE_TTL)
+_ANALYSIS_CACHE = TTLCache(maxsize=4096, ttl=CACHE_TTL)
+_CACHE_LOCK = threading.Lock()
+
+def _get_cached(cache: TTLCache, key: str):
+    with _CACHE_LOCK:
+        return cache.get(key)
+
+def _set_cached(cache: TTLCache, key: str, value):
+    with _CACHE_LOCK:
+        cache[key] = value
+
+def reset_caches():
+    """Drop cached Web Archive lookups"""
+    with _CACHE_LOCK:
+        _AVAILABILITY_CACHE.clear()
+        _COUNT_CACHE.clear()
+        _ANALYSIS_CACHE.clear()
+
 class WebArchiveAnalyzer:
     """
     Analyzer for Web Archive (Wayback Machine) data
     """
     
     def __init__(self):
-        self.wayback_base_url = "http://archive.org/wayback/available"
-        self.cdx_base_url = "http://web.archive.org/cdx/search/search/cdx"
+        self.wayback_base_url = "https://archive.org/wayback/available"
+        self.cdx_base_url = "https://web.archive.org/cdx/search/cdx"
+        
+        # Persistent client so connections to archive.org are reused across
+        # calls, created on first use. analyze_webarchive calls it from two
+        # threads at once, so creation is locked.
+        self._client = None
+        self._client_lock = threading.Lock()
+    
+    def _get_client(self) -> 'httpx.Client':
+        """Return the persistent archive.org client, creating it if needed"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+    
+    def _create_client(self, asynchronous: bool = False):
+        """Create an archive.org HTTP/2 client with connection retries, sync or async"""
+        import httpx
+        
+        limits = httpx.Limits(max_connections=WEBARCHIVE_CONCURRENCY, max_keepalive_connections=WEBARCHIVE_CONCURRENCY)
+        if asynchronous:
+            return httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(http2=True, retries=WEBARCHIVE_RETRIES, limits=limits),
+                timeout=10
+            )
+        return httpx.Client(
+            transport=httpx.HTTPTransport(http2=True, retries=WEBARCHIVE_RETRIES, limits=limits),
+            timeout=10
+        )
     
     def check_wayback_availability(self, domain: str) -> Dict[str, any]:
         """Check if domain has snapshots in Wayback Machine"""
+        cached = _get_cached(_AVAILABILITY_CACHE, domain)
+        if cached is not None:
+            return dict(cached)
+        
         try:
-            response = requests.get(
-                f"{self.wayback_base_url}?url={domain}",
-                timeout=10
-            )
+            response = self._get_client().get(self.wayback_base_url, params={'url': domain})
             if response.status_code == 200:
-                data = response.json()
-                return {
+                data = orjson.loads(response.content)
+                availability = {
                     'available': data.get('available', False),
                     'url': data.get('archived_snapshots', {}).get('closest', {}).get('url', ''),
                     'timestamp': data.get('archived_snapshots', {}).get('closest', {}).get('timestamp', ''),
                     'status': data.get('archived_snapshots', {}).get('closest', {}).get('status', '')
                 }
+                _set_cached(_AVAILABILITY_CACHE, domain, dict(availability))
+                return availability
             else:
                 logger.warning(f"Wayback availability check failed for {domain}: {response.status_code}")
                 return {'available': False}
@@ -37,72 +117,138 @@ class WebArchiveAnalyzer:
             return {'available': False}
     
     def get_snapshot_count(self, domain: str) -> int:
-        """Get approximate number of snapshots for domain"""
+        """Get the number of CDX result pages for domain, a coarse measure of snapshot volume"""
         try:
-            response = requests.get(
-                f"{self.cdx_base_url}?url={domain}&output=json&limit=1&showNumPages=true",
-                timeout=10
-            )
-            if response.status_code == 200:
-                data = response.json()
-                return data.get('num_pages', 0)
-            return 0
+            return self._page_count(domain)
         except Exception as e:
             logger.error(f"Error getting snapshot count for {domain}: {e}")
             return 0
     
-    def analyze_webarchive(self, domain: str) -> Dict[str, any]:
-        """Comprehensive Web Archive analysis for domain"""
-        analysis = {
+    def _page_count(self, domain: str) -> int:
+        """Get the CDX page count for domain, raising if the query fails"""
+        cached = _get_cached(_COUNT_CACHE, domain)
+        if cached is not None:
+            return cached
+        
+        count = self._parse_page_count(self._cdx(domain, CDX_COUNT_QUERY))
+        _set_cached(_COUNT_CACHE, domain, count)
+        return count
+    
+    def _cdx(self, domain: str, query: Dict[str, str]):
+        """Run a CDX query for domain and return the decoded response"""
+        response = self._get_client().get(self.cdx_base_url, params={'url': domain, **query})
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    async def _cdx_async(self, client: 'httpx.AsyncClient', domain: str, query: Dict[str, str]):
+        """Run a CDX query for domain using an async client"""
+        response = await client.get(self.cdx_base_url, params={'url': domain, **query})
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    def _parse_page_count(self, data) -> int:
+        """Read the page count from a showNumPages response"""
+        # The CDX server answers with a bare number, some mirrors wrap it in an object
+        if isinstance(data, dict):
+            return int(data.get('pages', 0))
+        return int(data)
+    
+    def _new_analysis(self, domain: str) -> Dict[str, any]:
+        """Analysis result for a domain with no snapshots found yet"""
+        return {
             'domain': domain,
             'has_snapshots': False,
-            'total_snapshots': 0,
+            'total_pages': 0,
             'first_snapshot': None,
             'last_snapshot': None,
             'years_covered': 0
         }
+    
+    def _apply_captures(self, analysis: Dict[str, any], years: List[List[str]], last: List[List[str]]):
+        """Fill snapshot fields from the year-collapsed and last-capture CDX responses"""
+        # First row of each response is the field header
+        timestamps = [row[0] for row in years[1:]]
+        if not timestamps:
+            return
+        
+        analysis['has_snapshots'] = True
+        analysis['first_snapshot'] = min(timestamps)
+        # The yearly rows only hold the first capture of each year
+        analysis['last_snapshot'] = last[-1][0] if len(last) > 1 else max(timestamps)
+        
+        # Calculate years covered
+        first_year = int(analysis['first_snapshot'][:4])
+        last_year = int(analysis['last_snapshot'][:4])
+        analysis['years_covered'] = last_year - first_year + 1
+    
+    def analyze_webarchive(self, domain: str) -> Dict[str, any]:
+        """Comprehensive Web Archive analysis for domain"""
+        cached = _get_cached(_ANALYSIS_CACHE, domain)
+        if cached is not None:
+            return dict(cached)
+        
+        analysis = self._new_analysis(domain)
         
         try:
-            availability = self.check_wayback_availability(domain)
-            analysis['has_snapshots'] = availability['available']
+            # The queries do not depend on each other, so they all run at once
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                years = executor.submit(self._cdx, domain, CDX_YEARS_QUERY)
+                last = executor.submit(self._cdx, domain, CDX_LAST_QUERY)
+                pages = executor.submit(self._page_count, domain)
+                
+                self._apply_captures(analysis, years.result(), last.result())
+                if analysis['has_snapshots']:
+                    analysis['total_pages'] = pages.result()
+            
+        except Exception as e:
+            logger.error(f"Error analyzing Web Archive for {domain}: {e}")
+            analysis['error'] = str(e)
+        else:
+            _set_cached(_ANALYSIS_CACHE, domain, dict(analysis))
+        
+        return analysis
+    
+    async def analyze_webarchive_async(self, client: 'httpx.AsyncClient', domain: str) -> Dict[str, any]:
+        """Web Archive analysis for domain using an async client"""
+        cached = _get_cached(_ANALYSIS_CACHE, domain)
+        if cached is not None:
+            return dict(cached)
+        
+        analysis = self._new_analysis(domain)
+        
+        try:
+            years, last, pages = await asyncio.gather(
+                self._cdx_async(client, domain, CDX_YEARS_QUERY),
+                self._cdx_async(client, domain, CDX_LAST_QUERY),
+                self._cdx_async(client, domain, CDX_COUNT_QUERY),
+                return_exceptions=True
+            )
+            for result in (years, last):
+                if isinstance(result, Exception):
+                    raise result
+            
+            self._apply_captures(analysis, years, last)
             
+            # The count only matters when there are snapshots to count
             if analysis['has_snapshots']:
-                analysis['total_snapshots'] = self.get_snapshot_count(domain)
-                
-                # Get first snapshot
-                response_first = requests.get(
-                    f"{self.cdx_base_url}?url={domain}&output=json&limit=1&sort=oldest",
-                    timeout=10
-                )
-                if response_first.status_code == 200:
-                    data_first = response_first.json()
-                    if data_first and len(data_first) > 1:
-                        analysis['first_snapshot'] = data_first[1][1]  # timestamp
-                
-                # Get last snapshot
-                response_last = requests.get(
-                    f"{self.cdx_base_url}?url={domain}&output=json&limit=1&sort=latest",
-                    timeout=10
-                )
-                if response_last.status_code == 200:
-                    data_last = response_last.json()
-                    if data_last and len(data_last) > 1:
-                        analysis['last_snapshot'] = data_last[1][1]
-                
-                # Calculate years covered
-                if analysis['first_snapshot'] and analysis['last_snapshot']:
-                    first_year = int(analysis['first_snapshot'][:4])
-                    last_year = int(analysis['last_snapshot'][:4])
-                    analysis['years_covered'] = last_year - first_year + 1
+                if isinstance(pages, Exception):
+                    raise pages
+                analysis['total_pages'] = self._parse_page_count(pages)
             
         except Exception as e:
             logger.error(f"Error analyzing Web Archive for {domain}: {e}")
             analysis['error'] = str(e)
+        else:
+            _set_cached(_ANALYSIS_CACHE, domain, dict(analysis))
         
         return analysis
     
     def batch_analyze_webarchive(self, domains: List[str]) -> Dict[str, any]:
         """Batch analysis of multiple domains in Web Archive"""
+        return asyncio.run(self.batch_analyze_webarchive_async(domains))
+    
+    async def batch_analyze_webarchive_async(self, domains: List[str]) -> Dict[str, any]:
+        """Analyze domains concurrently, at most WEBARCHIVE_CONCURRENCY at a time"""
         results = {
             'total_domains': len(domains),
             'processed': 0,
@@ -111,19 +257,38 @@ class WebArchiveAnalyzer:
             'domains': []
         }
         
+        # Serve recently analyzed domains from the cache and query only the rest
+        cached = {domain: _get_cached(_ANALYSIS_CACHE, domain) for domain in domains}
+        misses = [domain for domain, analysis in cached.items() if analysis is None]
+        
+        fetched = {}
+        if misses:
+            semaphore = asyncio.Semaphore(WEBARCHIVE_CONCURRENCY)
+            
+            async with self._create_client(asynchronous=True) as client:
+                async def analyze(domain):
+                    async with semaphore:
+                        return await self.analyze_webarchive_async(client, domain)
+                
+                analyses = await asyncio.gather(
+                    *[analyze(domain) for domain in misses],
+                    return_exceptions=True
+                )
+            fetched = dict(zip(misses, analyses))
+        
         for domain in domains:
-            try:
-                analysis = self.analyze_webarchive(domain)
-                results['domains'].append(analysis)
-                results['successful'] += 1
-            except Exception as e:
-                logger.error(f"Failed to analyze {domain}: {e}")
+            analysis = dict(cached[domain]) if cached[domain] is not None else fetched[domain]
+            if isinstance(analysis, Exception):
+                logger.error(f"Failed to analyze {domain}: {analysis}")
                 results['domains'].append({
                     'domain': domain,
-                    'error': str(e)
+                    'error': str(analysis)
                 })
                 results['failed'] += 1
+            else:
+                results['domains'].append(analysis)
+                results['successful'] += 1
             
             results['processed'] += 1
         
-        return results
\ No newline at end of file
+        return results
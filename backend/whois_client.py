@@ -0,0 +1,112 @@
+import socket
+import threading
+import logging
+from typing import Dict, List, Tuple
+
+from whois import NICClient, extract_domain
+from whois.parser import PywhoisError, WhoisEntry
+
+logger = logging.getLogger(__name__)
+
+WHOIS_PORT = 43
+
+# Servers that expect extra flags around the queried name
+QUERY_FORMATS = {
+    NICClient.DENICHOST: '-T dn,ace -C UTF-8 {}',
+    NICClient.DK_HOST: ' --show-handles {}',
+}
+
+class WhoisClient:
+    """
+    Minimal WHOIS (RFC 3912) client used in place of whois.whois()
+
+    RFC 3912 servers close the connection after answering a single query, so
+    connections cannot be held open and pipelined. What is kept between
+    queries are the resolved addresses of every WHOIS server, which removes a
+    DNS lookup from each query to the same registry. Server selection,
+    referral detection and parsing are delegated to python-whois.
+    """
+
+    def __init__(self, timeout: int = 10):
+        self.timeout = timeout
+        self._nic_client = NICClient()
+        self._addresses: Dict[str, List[Tuple]] = {}
+        self._lock = threading.Lock()
+
+    def whois(self, domain: str) -> WhoisEntry:
+        """Look up the registered domain and parse the response"""
+        domain = extract_domain(domain)
+        server = self._nic_client.choose_server(domain)
+        if not server:
+            raise PywhoisError(f'No WHOIS server found for {domain}')
+
+        text = self.query(domain, server)
+
+        # Thin registries only point at the registrar's server, follow it once
+        referral = self._nic_client.findwhois_server(text, server, domain)
+        if referral and referral != server:
+            try:
+                text += self.query(domain, referral)
+            except OSError as e:
+                logger.warning(f"WHOIS referral to {referral} failed for {domain}: {e}")
+
+        return WhoisEntry.load(domain, text)
+
+    def query(self, domain: str, server: str) -> str:
+        """Send one query to a WHOIS server and read until it closes the connection"""
+        query = QUERY_FORMATS.get(server, '{}').format(domain.encode('idna').decode('ascii'))
+        text = self._send(server, query)
+
+        # The whois-servers.net registries list multiple matches unless asked for an exact one
+        if server.endswith(NICClient.QNICHOST_TAIL) and 'with "=xxx"' in text:
+            text = self._send(server, f'={query}')
+
+        return text
+
+    def _send(self, server: str, query: str) -> str:
+        """Open a connection, send the query and return the full response"""
+        with self._connect(server) as sock:
+            sock.sendall(query.encode('utf-8') + b'\r\n')
+
+            chunks = []
+            while True:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+
+        return b''.join(chunks).decode('utf-8', 'replace')
+
+    def _connect(self, server: str) -> socket.socket:
+        """Connect to the first reachable address of a WHOIS server, as socket.create_connection does"""
+        error = None
+        for family, address in self._resolve(server):
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                sock.settimeout(self.timeout)
+                sock.connect(address)
+                return sock
+            except OSError as e:
+                sock.close()
+                error = e
+
+        # The server may have moved, resolve it again next time
+        with self._lock:
+            self._addresses.pop(server, None)
+        raise error
+
+    def _resolve(self, server: str) -> List[Tuple]:
+        """Return every (family, address) of a WHOIS server, resolving it once"""
+        with self._lock:
+            cached = self._addresses.get(server)
+        if cached is not None:
+            return cached
+
+        addresses = [
+            (family, address)
+            for family, _, _, _, address in socket.getaddrinfo(server, WHOIS_PORT, type=socket.SOCK_STREAM)
+        ]
+
+        with self._lock:
+            self._addresses[server] = addresses
+        return addresses
@@ -2,9 +2,15 @@ import React from 'react'
 import { Link, Outlet } from 'react-router-dom'
 import { LogOut } from 'lucide-react'
 import { Button } from '@/components/ui/button'
+import { logout } from '@/lib/enhanced-api-client'
 
 const Layout = () => {
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    try {
+      await logout()
+    } catch (error) {
+      // The token is dropped locally either way
+    }
     localStorage.removeItem('token')
     window.location.href = '/login'
   }
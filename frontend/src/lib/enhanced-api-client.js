@@ -34,19 +34,55 @@ export const login = async (username, password) => {
   return response.data
 }
 
+export const logout = async () => {
+  const response = await api.post('/auth/logout')
+  return response.data
+}
+
 export const register = async (username, password, email) => {
   const response = await api.post('/auth/register', { username, password, email })
   return response.data
 }
 
+// Analysis runs as a background job on the server; poll until it is done,
+// backing off between polls and giving up after JOB_TIMEOUT
+const JOB_POLL_INTERVAL = 1000
+const JOB_POLL_MAX_INTERVAL = 10000
+const JOB_POLL_BACKOFF = 1.5
+const JOB_TIMEOUT = 30 * 60 * 1000
+
+export const getJob = async (jobId) => {
+  const response = await api.get(`/jobs/${jobId}`)
+  return response.data
+}
+
+const waitForJob = async (jobId) => {
+  const deadline = Date.now() + JOB_TIMEOUT
+  let interval = JOB_POLL_INTERVAL
+  for (;;) {
+    const job = await getJob(jobId)
+    if (job.status === 'finished') {
+      return job.result
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Analysis failed')
+    }
+    if (Date.now() + interval > deadline) {
+      throw new Error('Analysis is taking too long, please try again later')
+    }
+    await new Promise((resolve) => setTimeout(resolve, interval))
+    interval = Math.min(interval * JOB_POLL_BACKOFF, JOB_POLL_MAX_INTERVAL)
+  }
+}
+
 export const analyzeDomains = async (domains) => {
   const response = await api.post('/domains/analyze', { domains })
-  return response.data
+  return waitForJob(response.data.job_id)
 }
 
 export const llmAnalyzeDomains = async (domains) => {
   const response = await api.post('/domains/llm-analyze', { domains })
-  return response.data
+  return waitForJob(response.data.job_id)
 }
 
 export const getDomains = async (page = 1, per_page = 10) => {